@@ -0,0 +1,128 @@
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connection
+
+from .models import UserSession
+
+logger = logging.getLogger(__name__)
+
+# Алиас кэша из settings.CACHES для меток "сессия недавно отмечена".
+# Кэш общий для воркеров, иначе каждый воркер отмечал бы сессию сам
+ACTIVITY_CACHE_ALIAS = 'activity'
+
+
+class SessionActivityBuffer:
+    """Отметки активности сессий, записываемые в UserSession пачками.
+
+    Отметка сессии принимается не чаще раза в USER_SESSION_TOUCH_INTERVAL
+    секунд (метка в общем для процессов кэше ACTIVITY_CACHE_ALIAS) и
+    попадает в буфер процесса. Первая отметка в пустом буфере запускает таймер:
+    через USER_SESSION_FLUSH_INTERVAL секунд буфер пишется одним upsert,
+    даже если запросов больше нет. При USER_SESSION_FLUSH_SIZE сессиях
+    буфер пишется сразу. Поэтому last_activity отстает от реального не
+    больше чем на сумму этих интервалов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def touch(self, session_key, user, ip_address, user_agent):
+        cache = caches[ACTIVITY_CACHE_ALIAS]
+        if not cache.add(f"user_session_touch:{session_key}", 1, settings.USER_SESSION_TOUCH_INTERVAL):
+            return
+
+        with self._lock:
+            self._pending[session_key] = UserSession(
+                session_key=session_key,
+                user_id=user.pk,
+                ip_address=ip_address,
+                user_agent=user_agent[:255],
+                is_active=True,
+            )
+            if len(self._pending) >= settings.USER_SESSION_FLUSH_SIZE:
+                # Полный буфер забирает ровно один поток
+                batch = self._take_batch()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(
+                        settings.USER_SESSION_FLUSH_INTERVAL, self._flush_by_timer
+                    )
+                    self._timer.daemon = True
+                    self._timer.start()
+
+        if batch:
+            self._write(batch)
+
+    def _flush_by_timer(self):
+        try:
+            self.flush()
+        finally:
+            # У потока таймера свое соединение с БД, держать его незачем
+            connection.close()
+
+    def _take_batch(self):
+        """Забирает буфер и отменяет таймер (вызывается под self._lock)"""
+        batch = list(self._pending.values())
+        self._pending.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def flush(self):
+        with self._lock:
+            batch = self._take_batch()
+        return self._write(batch)
+
+    def stop(self):
+        """Останавливает таймер и дописывает буфер (остановка воркера, тесты).
+
+        Таймер мог уже сработать: тогда дожидаемся его записи, чтобы после
+        stop() поток не обращался к БД.
+        """
+        with self._lock:
+            timer = self._timer
+            batch = self._take_batch()
+        if timer is not None and timer is not threading.current_thread():
+            timer.join()
+        return self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return 0
+
+        try:
+            # last_activity (auto_now) проставляется в момент записи
+            UserSession.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=['session_key'],
+                update_fields=['user', 'ip_address', 'user_agent', 'last_activity', 'is_active'],
+            )
+        except DatabaseError as e:
+            # Например, пользователь удален, пока отметка ждала в буфере
+            logger.warning(f"Не удалось записать активность {len(batch)} сессий: {e}")
+            return 0
+        return len(batch)
+
+    def reset(self):
+        """Очищает буфер без записи (дочерний процесс после fork)"""
+        self._lock = threading.Lock()
+        self._pending = {}
+        # Потоки таймера после fork не переходят в дочерний процесс
+        self._timer = None
+
+
+session_activity = SessionActivityBuffer()
+
+# Остаток буфера дописывается при остановке воркера
+atexit.register(session_activity.stop)
+os.register_at_fork(after_in_child=session_activity.reset)
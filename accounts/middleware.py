@@ -1,7 +1,7 @@
 from django.contrib import messages
-from django.utils import timezone
-from .models import UserSession
-import os
+from django.conf import settings
+from .activity import session_activity
+import time
 
 class ClearMessagesMiddleware:
     """Middleware для очистки сообщений на страницах с формами"""
@@ -29,7 +29,12 @@ class ClearMessagesMiddleware:
         return response
 
 class DynamicSessionMiddleware:
-    """Middleware для динамического управления временем жизни сессии"""
+    """Middleware для динамического управления временем жизни сессии.
+
+    Срок жизни сессии продлевается и активность пишется в UserSession не
+    на каждый запрос, а не чаще раза в USER_SESSION_TOUCH_INTERVAL секунд:
+    иначе каждый запрос (включая AJAX) давал несколько записей в БД.
+    """
     
     def __init__(self, get_response):
         self.get_response = get_response
@@ -44,28 +49,32 @@ class DynamicSessionMiddleware:
             
             if request.user.is_authenticated:
                 # Для авторизованных - 30 дней
-                request.session.set_expiry(2592000)  # 30 дней
+                self.touch_session(request.session, 2592000)  # 30 дней
                 
-                # Получаем или создаем запись о сессии
-                user_session, created = UserSession.objects.update_or_create(
-                    session_key=session_key,
-                    defaults={
-                        'user': request.user,
-                        'ip_address': request.META.get('REMOTE_ADDR'),
-                        'user_agent': request.META.get('HTTP_USER_AGENT', '')[:255],
-                        'last_activity': timezone.now(),
-                        'is_active': True
-                    }
+                # Отметка активности копится в буфере и пишется пачкой
+                session_activity.touch(
+                    session_key,
+                    request.user,
+                    request.META.get('REMOTE_ADDR'),
+                    request.META.get('HTTP_USER_AGENT', '')
                 )
                 
-                # Если сессия только что создана, связываем с ней результаты
-                if created and hasattr(request, 'session_results'):
-                    # Связываем результаты из этой сессии
-                    for result in request.session_results:
-                        user_session.results.add(result)
-                
             else:
                 # Для гостей - 1 день
-                request.session.set_expiry(86400)  # 1 день
+                self.touch_session(request.session, 86400)  # 1 день
         
-        return response
\ No newline at end of file
+        return response
+    
+    @staticmethod
+    def touch_session(session, expiry):
+        """Продлевает сессию, если срок другой или прошло больше интервала.
+
+        Скользящий срок жизни сохраняется с точностью до
+        USER_SESSION_TOUCH_INTERVAL, а сессия сохраняется только тогда.
+        """
+        now = int(time.time())
+        if session.get('_session_expiry') != expiry:
+            session.set_expiry(expiry)
+        elif now - session.get('_last_touch', 0) < settings.USER_SESSION_TOUCH_INTERVAL:
+            return
+        session['_last_touch'] = now
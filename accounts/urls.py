@@ -6,6 +6,7 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('history/', views.history_api, name='history_api'),
     path('profile/', views.profile_view, name='profile'),
 
     # Новый URL для просмотра результата
@@ -4,9 +4,14 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .forms import CustomUserCreationForm, CustomAuthenticationForm
 from recognition_images.models import DetectionResult, Component
+from recognition_images import access, history, retention
 from django.shortcuts import render, get_object_or_404
 import logging
 from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.dateformat import format as date_format
+from django.utils.timezone import localtime
+from urllib.parse import urlencode
 logger = logging.getLogger(__name__)
 
 def register_view(request):
@@ -18,10 +23,14 @@ def register_view(request):
             
             # Переносим данные из анонимной сессии в аккаунт
             session_key = request.session.session_key
-            DetectionResult.objects.filter(
+            guest_results = DetectionResult.objects.filter(
                 session_key=session_key, 
                 user__isnull=True
-            ).update(user=user)
+            )
+            result_ids = list(guest_results.values_list('result_id', flat=True))
+            guest_results.update(user=user)
+            history.invalidate_result_count(user.pk)
+            access.forget_results(*result_ids)
             Component.objects.filter(
                 session_key=session_key, 
                 user__isnull=True
@@ -91,9 +100,12 @@ def login_view(request):
                     user__isnull=True
                 )
                 
-                if old_results.exists():
+                result_ids = list(old_results.values_list('result_id', flat=True))
+                if result_ids:
                     # Переносим результаты
                     old_results.update(user=user)
+                    history.invalidate_result_count(user.pk)
+                    access.forget_results(*result_ids)
                     
                     # Переносим компоненты
                     Component.objects.filter(
@@ -124,33 +136,65 @@ def logout_view(request):
 
 @login_required
 def dashboard_view(request):
-    """Личный кабинет пользователя / История запросов за последний месяц"""
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    # Дата месяц назад
-    month_ago = timezone.now() - timedelta(days=30)
-    
-    # Получаем результаты пользователя за последний месяц
-    recent_results = DetectionResult.objects.filter(
-        user=request.user,
-        created_at__gte=month_ago  # только за последний месяц
-    ).order_by('-created_at')
-    
-    # Для отладки - проверим формат изображений
-    for result in recent_results:
-        if result.image_base64:
-            # Убедимся, что изображение в правильном формате
-            if not result.image_base64.startswith('data:image'):
-                # Если это просто base64, добавляем префикс
-                result.image_base64 = f"data:image/jpeg;base64,{result.image_base64}"
+    """Личный кабинет пользователя / История запросов за последний месяц.
+
+    Сразу отдается первая страница, следующие страницы dashboard.js
+    подгружает из history_api при прокрутке.
+    """
+    favorites = request.GET.get('favorites') == '1'
+    recent_results, next_cursor = history.history_page(request.user, favorites=favorites)
     
     context = {
         'recent_results': recent_results,
-        'total_results': recent_results.count(),
+        'total_results': history.result_count(request.user, favorites),
+        'next_page_url': _history_page_url(next_cursor, favorites),
     }
     return render(request, 'accounts/dashboard.html', context)
 
+
+@login_required
+def history_api(request):
+    """JSON страница истории для бесконечной прокрутки (?cursor=...&favorites=1)"""
+    favorites = request.GET.get('favorites') == '1'
+    try:
+        results, next_cursor = history.history_page(
+            request.user,
+            cursor=request.GET.get('cursor'),
+            favorites=favorites
+        )
+    except history.HistoryCursorError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'results': [
+            {
+                'result_id': result.result_id,
+                'name': result.name,
+                'url': reverse('view_result', args=[result.result_id]),
+                'thumbnail_url': result.thumbnail_url,
+                'created_at': result.created_at.isoformat(),
+                # Строки в том же формате, что и в шаблоне кабинета
+                'date': date_format(localtime(result.created_at), 'd.m.Y'),
+                'time': date_format(localtime(result.created_at), 'H:i'),
+                'edited_at': date_format(localtime(result.edited_at), 'd.m.Y H:i') if result.is_edited else None,
+                'is_favorite': result.is_favorite,
+            }
+            for result in results
+        ],
+        'next_page_url': _history_page_url(next_cursor, favorites),
+        'total': history.result_count(request.user, favorites),
+    })
+
+
+def _history_page_url(cursor, favorites):
+    if not cursor:
+        return None
+    params = {'cursor': cursor}
+    if favorites:
+        params['favorites'] = '1'
+    return f"{reverse('history_api')}?{urlencode(params)}"
+
 @login_required
 def profile_view(request):
     """Просмотр и редактирование профиля"""
@@ -234,6 +278,8 @@ def delete_result(request):
             result_name = result.name
             
             result.delete()
+            # Файлы результата в blob_storage, если на них никто не ссылается
+            retention.delete_unused_blobs([result])
             
             logger.info(f"Результат {result_id} ({result_name}) удален. Удалено компонентов: {components_count}")
             
@@ -162,6 +162,175 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Content-addressed хранилище изображений результатов распознавания
+BLOB_STORAGE_ROOT = os.path.join(MEDIA_ROOT, 'blobs')
+BLOB_STORAGE_URL = MEDIA_URL + 'blobs/'
+
+# Миниатюры для истории запросов
+THUMBNAIL_SIZE = 320  # px по длинной стороне
+THUMBNAIL_FORMAT = 'WEBP'  # если Pillow собран без WebP - будет JPEG
+THUMBNAIL_QUALITY = 80
+
+# Очередь распознавания (воркер: manage.py run_detection_worker)
+DETECTION_ASYNC = True  # False - распознавать прямо в запросе, без воркера
+DETECTION_WORKER_POLL_INTERVAL = 1  # секунд между проверками пустой очереди
+DETECTION_JOB_TIMEOUT = 600  # через сколько секунд зависшая задача снова берется в работу
+DETECTION_JOB_MAX_ATTEMPTS = 3
+# Сколько изображений одного пакета (страниц PDF, файлов архива)
+# распознается одновременно
+DETECTION_CONCURRENCY = 4
+# Сколько задач очереди один воркер берет и выполняет параллельно
+DETECTION_WORKER_CONCURRENCY = 4
+
+# Подготовка изображений перед распознаванием: поворот по EXIF и
+# уменьшение длинной стороны до DETECTION_MAX_EDGE пикселей
+DETECTION_MAX_EDGE = 2560
+DETECTION_JPEG_QUALITY = 90
+
+# Повторная загрузка того же файла (по SHA-256) в течение этого времени
+# копирует прошлый результат без обращения к нейросети. 0 - отключить
+DETECTION_REUSE_TTL = 7 * 24 * 60 * 60  # секунд
+
+# История запросов в личном кабинете: окно в днях, размер страницы
+# бесконечной прокрутки и срок жизни кэша счетчика результатов
+HISTORY_DAYS = 30
+HISTORY_PAGE_SIZE = 20
+HISTORY_COUNT_CACHE_TIMEOUT = 10 * 60  # секунд
+
+# Индекс доступа к результатам (владелец по result_id) в кэше: запись
+# обновляется при создании, переносе и удалении результата, срок жизни
+# ограничивает память под давно не открывавшиеся результаты
+RESULT_ACCESS_CACHE_TIMEOUT = 24 * 60 * 60  # секунд
+
+# Результаты старше этого срока (в днях) вместе с компонентами и файлами
+# удаляет команда purge_old_results. Пользователь видит предупреждение
+# об удалении уже после 30 дней
+RESULT_RETENTION_DAYS = 45
+RESULT_PURGE_CHUNK_SIZE = 500
+
+# Пакетная загрузка (upload-batch/): несколько файлов или zip-архив
+BATCH_MAX_FILES = 100
+BATCH_MAX_FILE_SIZE = 20 * 1024 * 1024  # байт, для файлов внутри архива
+
+# Серверная растеризация многостраничных PDF (pdf2image/poppler)
+PDF_RASTER_DPI = 200
+PDF_RASTER_PROCESSES = 2
+PDF_MAX_PAGES = 20
+
+# Внешние сервисы: нейросеть (APIClient) и каталог (DBClient)
+DETECTION_API_URL = os.getenv('DETECTION_API_URL', 'http://82.202.129.245:8002')
+DETECTION_API_CONNECT_TIMEOUT = 30  # секунд
+DETECTION_API_READ_TIMEOUT = 500  # секунд, распознавание может идти долго
+DB_API_URL = os.getenv('DB_API_URL', 'http://213.172.24.109:8001')
+DB_API_TIMEOUT = 30  # секунд
+
+# Пул HTTP-соединений общих клиентов: число хостов и соединений на хост
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 10
+
+# Генерация PDF коммерческого предложения:
+# 'xhtml2pdf' - внутри процесса, 'wkhtmltopdf' - внешняя программа через pdfkit
+PDF_BACKEND = os.getenv('PDF_BACKEND', 'xhtml2pdf')
+# Увеличить при изменении шаблонов PDF, чтобы не отдавать старые файлы из кэша
+PDF_TEMPLATE_VERSION = 1
+# PDF больше этого размера (байт) не кэшируются
+PDF_CACHE_MAX_SIZE = 5 * 1024 * 1024
+# Одновременных генераций PDF в одном процессе; остальные ждут
+# PDF_QUEUE_TIMEOUT секунд, затем получают 503
+PDF_MAX_CONCURRENCY = 2
+PDF_QUEUE_TIMEOUT = 30
+# Фоновая генерация PDF: create_pdf сразу возвращает id задачи,
+# страница опрашивает статус (раз в PDF_JOB_POLL_INTERVAL секунд)
+# и скачивает готовый файл
+PDF_ASYNC = False
+PDF_JOB_POLL_INTERVAL = 1  # секунд
+# Задача без результата дольше этого времени считается упавшей
+# (процесс мог быть убит посреди генерации)
+PDF_JOB_TIMEOUT = 5 * 60  # секунд
+# Путь к wkhtmltopdf, если программы нет в PATH
+# (Windows: C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe, beget: /usr/local/bin/wkhtmltopdf)
+WKHTMLTOPDF_PATH = os.getenv('WKHTMLTOPDF_PATH')
+
+# Как часто (в секундах) проверять, не изменились ли шрифт и картинки для PDF
+PDF_ASSETS_CHECK_INTERVAL = 0 if DEBUG else 300
+
+# Сколько запросов к каталогу (DBClient) выполняется параллельно
+DB_SEARCH_CONCURRENCY = 8
+
+# Каталог файловых кэшей, общих для всех воркеров на сервере
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(BASE_DIR, 'cache'))
+
+# Кэши. 'catalog' - результаты поиска в каталоге (DBClient):
+# TIMEOUT - время жизни записи, MAX_ENTRIES - ограничение размера,
+# при переполнении удаляется треть записей (CULL_FREQUENCY).
+# Кэши, которые сбрасываются при изменениях данных, должны быть общими
+# для всех воркеров: LocMemCache живет внутри процесса, и сброс в одном
+# воркере не виден остальным. Поэтому они файловые (для нескольких
+# серверов - укажите общий backend, например Redis).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Результаты поиска в каталоге: ограничен по числу записей, при
+    # переполнении вытесняются давно не читанные (LRU). Для нескольких
+    # серверов - Redis с maxmemory-policy allkeys-lru
+    'catalog': {
+        'BACKEND': 'recognition_images.cache_backends.LRUFileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'catalog-search'),
+        'TIMEOUT': 6 * 60 * 60,  # 6 часов
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            # Как часто (раз в сколько записей процесса) проверять размер
+            'CULL_CHECK_INTERVAL': 50,
+        },
+    },
+    # Готовые PDF коммерческих предложений (LRU по числу файлов)
+    'pdf': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'offer-pdf',
+        'TIMEOUT': 24 * 60 * 60,  # сутки, дата в PDF все равно меняется
+        'OPTIONS': {
+            'MAX_ENTRIES': 100,
+        },
+    },
+    # Счетчики результатов в истории личного кабинета (по пользователю)
+    'history': {
+        'BACKEND': 'recognition_images.cache_backends.LRUFileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'history-count'),
+        'TIMEOUT': HISTORY_COUNT_CACHE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Метки "сессия недавно отмечена" (accounts.activity), по сессии;
+    # срок жизни метки - USER_SESSION_TOUCH_INTERVAL, задается при записи
+    'activity': {
+        'BACKEND': 'recognition_images.cache_backends.LRUFileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'session-activity'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+    # Отрендеренные страницы результатов (по результату и владельцу)
+    'results': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'results-page'),
+        'TIMEOUT': 60 * 60,  # час; изменения результата сбрасывают кэш сразу
+        'OPTIONS': {
+            'MAX_ENTRIES': 300,
+        },
+    },
+    # Индекс доступа к результатам: result_id -> владелец (маленькие записи).
+    # Удаление и перенос результата сбрасывают запись, поэтому кэш общий
+    'access': {
+        'BACKEND': 'recognition_images.cache_backends.LRUFileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'result-access'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    },
+}
+
 # Безопасность
 SESSION_COOKIE_SECURE = IS_PRODUCTION
 CSRF_COOKIE_SECURE = IS_PRODUCTION
@@ -173,5 +342,14 @@ SECURE_SSL_REDIRECT = IS_PRODUCTION
 # Закрывать сессию при закрытии браузера
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False  # True - закрывать, False - не закрывать
 
-# Обновлять сессию при каждом запросе (продлевает жизнь)
-SESSION_SAVE_EVERY_REQUEST = True
\ No newline at end of file
+# Не сохранять сессию на каждый запрос: срок жизни продлевает
+# DynamicSessionMiddleware не чаще раза в USER_SESSION_TOUCH_INTERVAL
+SESSION_SAVE_EVERY_REQUEST = False
+
+# Активность сессий (UserSession): сессия продлевается и отмечается не
+# чаще раза в USER_SESSION_TOUCH_INTERVAL, отметки пишутся в БД пачкой
+# по таймеру через USER_SESSION_FLUSH_INTERVAL после первой отметки или
+# сразу по USER_SESSION_FLUSH_SIZE штук
+USER_SESSION_TOUCH_INTERVAL = 5 * 60  # секунд
+USER_SESSION_FLUSH_INTERVAL = 10  # секунд
+USER_SESSION_FLUSH_SIZE = 100
\ No newline at end of file
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from . import models
+
+ACCESS_CACHE_ALIAS = 'access'
+
+
+def _access_key(result_id):
+    return f"result_access:{result_id}"
+
+
+def remember_results(results):
+    """Записывает владельцев результатов в индекс доступа (одним set_many)"""
+    entries = {
+        _access_key(result.result_id): (result.user_id, result.session_key, result.created_at)
+        for result in results if result.result_id
+    }
+    if entries:
+        caches[ACCESS_CACHE_ALIAS].set_many(entries, settings.RESULT_ACCESS_CACHE_TIMEOUT)
+
+
+def forget_results(*result_ids):
+    """Убирает результаты из индекса (удаление или смена владельца)"""
+    keys = [_access_key(result_id) for result_id in result_ids if result_id]
+    if keys:
+        caches[ACCESS_CACHE_ALIAS].delete_many(keys)
+
+
+def result_owner(result_id):
+    """(user_id, session_key, created_at) результата или None, если его нет.
+
+    Индекс заполняется при создании результата, при промахе владелец
+    читается из БД и записывается в индекс. Отсутствие результата не
+    кэшируется: иначе результат из bulk_create без сигналов был бы
+    "не найден" до истечения записи.
+    """
+    owner = caches[ACCESS_CACHE_ALIAS].get(_access_key(result_id))
+    if owner is not None:
+        return owner
+
+    result = models.DetectionResult.objects.only(
+        'id', 'result_id', 'user_id', 'session_key', 'created_at'
+    ).filter(result_id=result_id).first()
+    if result is None:
+        return None
+    remember_results([result])
+    return result.user_id, result.session_key, result.created_at
+
+
+def can_access(result_id, user=None, session_key=None, max_age=None):
+    """Доступен ли результат пользователю или гостевой сессии.
+
+    Правило то же, что у get_user_or_session_filter: результат
+    пользователя доступен только ему, гостевой - своей сессии. Результат
+    старше max_age (timedelta), если он задан, недоступен.
+    """
+    if not result_id:
+        return False
+
+    owner = result_owner(result_id)
+    if owner is None:
+        return False
+
+    owner_id, owner_session, created_at = owner
+    if max_age is not None and created_at < timezone.now() - max_age:
+        return False
+    if user is not None and user.is_authenticated:
+        return owner_id == user.pk
+    return owner_id is None and bool(session_key) and owner_session == session_key
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Component, DetectionResult
+from .models import Component, DetectionResult, DetectionJob
 
 @admin.register(Component)
 class ComponentAdmin(admin.ModelAdmin):
@@ -72,11 +72,12 @@ class DetectionResultAdmin(admin.ModelAdmin):
     
     list_filter = ('is_edited', 'created_at', 'user')
     
-    search_fields = ('name', 'result_id', 'user__username', 'session_key')
+    search_fields = ('name', 'result_id', 'batch_id', 'user__username', 'session_key')
     
-    readonly_fields = ('created_at', 'result_id', 'preview_data')
+    readonly_fields = ('created_at', 'result_id', 'preview_data', 'image_key', 'image_size', 'result_image_preview')
     
     list_per_page = 25
+    list_select_related = ('user',)
     
     fieldsets = (
         ('Основное', {
@@ -90,7 +91,7 @@ class DetectionResultAdmin(admin.ModelAdmin):
             'classes': ('wide',)
         }),
         ('Изображение', {
-            'fields': ('image_base64', 'preview_data'),
+            'fields': ('image_key', 'image_size', 'result_image_preview', 'preview_data'),
             'classes': ('collapse',)
         }),
         ('Метаданные', {
@@ -118,11 +119,32 @@ class DetectionResultAdmin(admin.ModelAdmin):
         return "-"
     session_key_short.short_description = 'Session'
     
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # В списке JSON-колонки не нужны; форма редактирования читает их целиком
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            queryset = queryset.summary().with_detected_count()
+        return queryset
+    
     def components_count(self, obj):
-        if obj.detected_data and 'components' in obj.detected_data:
-            return len(obj.detected_data['components'])
-        return 0
+        return obj.detected_count
     components_count.short_description = 'Компонентов'
+    components_count.admin_order_field = 'detected_count'
+    
+    def image_size(self, obj):
+        if obj.image_width and obj.image_height:
+            return f"{obj.image_width}×{obj.image_height}"
+        return "-"
+    image_size.short_description = 'Размер'
+    
+    def result_image_preview(self, obj):
+        if obj.image_key:
+            return format_html(
+                '<img src="{}" style="max-height: 300px;" />',
+                obj.image_url
+            )
+        return "Нет изображения"
+    result_image_preview.short_description = 'Изображение'
     
     def preview_data(self, obj):
         """Превью данных в читаемом формате"""
@@ -152,4 +174,22 @@ class DetectionResultAdmin(admin.ModelAdmin):
         from django.http import JsonResponse
         data = list(queryset.values('id', 'name', 'created_at', 'is_edited'))
         return JsonResponse(data, safe=False)
-    export_selected.short_description = "Экспортировать выбранные"
\ No newline at end of file
+    export_selected.short_description = "Экспортировать выбранные"
+
+
+@admin.register(DetectionJob)
+class DetectionJobAdmin(admin.ModelAdmin):
+    """Админка для очереди распознавания"""
+    
+    list_display = (
+        'id', 'job_id', 'status', 'user', 'batch_id', 'page_number', 'attempts',
+        'created_at', 'started_at', 'finished_at'
+    )
+    
+    list_filter = ('status', 'created_at')
+    
+    search_fields = ('job_id', 'result_id', 'batch_id', 'user__username', 'session_key')
+    
+    readonly_fields = ('job_id', 'created_at', 'started_at', 'finished_at', 'result_id', 'error')
+    
+    list_per_page = 50
@@ -1,15 +1,120 @@
+import os
+import io
+import uuid
+import threading
 import requests
 import base64
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from django.conf import settings
+
+# Размер блока, которым тело запроса читается при отправке
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class MultipartFileStream:
+    """Тело multipart/form-data с одним файлом, которое отдается по частям.
+
+    requests собирает multipart целиком в памяти, а этот объект читается
+    блоками прямо из файла. Для загрузок, которые Django держит в памяти
+    (BytesIO), блоки - это срезы memoryview без копирования.
+    """
+
+    def __init__(self, fileobj, file_name, field_name='file', content_type='application/octet-stream'):
+        self.boundary = uuid.uuid4().hex
+        safe_name = os.path.basename(file_name or 'upload').replace('"', '%22')
+
+        head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{safe_name}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode('utf-8')
+        tail = f'\r\n--{self.boundary}--\r\n'.encode('ascii')
+
+        if hasattr(fileobj, 'seek'):
+            fileobj.seek(0)
+
+        self._memory = None
+        raw = getattr(fileobj, 'file', fileobj)
+        if isinstance(raw, io.BytesIO):
+            self._memory = raw.getbuffer()
+            size = len(self._memory)
+            parts = self._memory_parts(self._memory)
+        else:
+            size = self._file_size(fileobj)
+            parts = self._file_parts(fileobj)
+
+        # requests берет Content-Length из атрибута len
+        self.len = len(head) + size + len(tail)
+        self._parts = iter([[head], parts, [tail]])
+        self._current = iter(())
+        self._buffer = b''
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    @staticmethod
+    def _file_size(fileobj):
+        size = getattr(fileobj, 'size', None)
+        if size is None:
+            size = os.fstat(fileobj.fileno()).st_size
+        return size
+
+    @staticmethod
+    def _memory_parts(body):
+        for start in range(0, len(body), UPLOAD_CHUNK_SIZE):
+            yield body[start:start + UPLOAD_CHUNK_SIZE]
+
+    @staticmethod
+    def _file_parts(fileobj):
+        while True:
+            chunk = fileobj.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def _next_chunk(self):
+        while True:
+            chunk = next(self._current, None)
+            if chunk is not None:
+                return chunk
+            self._current = next(self._parts, None)
+            if self._current is None:
+                return b''
+            self._current = iter(self._current)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return b''.join([bytes(self._buffer)] + [bytes(chunk) for chunk in iter(self._next_chunk, b'')])
+
+        # Обычно отдаем блок целиком, без склейки и копирования
+        if not self._buffer:
+            chunk = self._next_chunk()
+            if len(chunk) <= size:
+                return chunk
+            self._buffer = chunk
+
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return bytes(data)
+
+    def close(self):
+        """Освобождает буфер загрузки, иначе Django не сможет закрыть BytesIO"""
+        self._parts = iter(())
+        self._current = iter(())
+        self._buffer = b''
+        if self._memory is not None:
+            self._memory.release()
+            self._memory = None
 
 
 """Класс для работы с API"""
 class APIClient:
-    def __init__(self, base_url="http://82.202.129.245:8002"):
-        self.base_url = base_url.rstrip('/')
+    def __init__(self, base_url=None):
+        self.base_url = (base_url or settings.DETECTION_API_URL).rstrip('/')
         self.session = requests.Session()
-        self.timeout = 500
+        self.connect_timeout = settings.DETECTION_API_CONNECT_TIMEOUT
+        self.timeout = settings.DETECTION_API_READ_TIMEOUT
         self.session.trust_env = False 
         self.session.mount('http://', HTTPAdapter(max_retries=Retry(total=3, backoff_factor=1)))
 
@@ -19,21 +124,38 @@ class APIClient:
             backoff_factor=0.1,
             status_forcelist=[500, 502, 503, 504]
         )
-        adapter = HTTPAdapter(max_retries=retry)
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=settings.HTTP_POOL_MAXSIZE
+        )
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
+
+    def _post_file(self, api_url, image):
+        """Отправляет файл потоком. image - путь к файлу или файловый объект
+        (в том числе UploadedFile/FieldFile Django)"""
+        if isinstance(image, (str, os.PathLike)):
+            with open(image, 'rb') as f:
+                return self._post_file(api_url, f)
+
+        body = MultipartFileStream(image, getattr(image, 'name', None))
+        try:
+            return self.session.post(
+                api_url,
+                data=body,
+                headers={'Content-Type': body.content_type},
+                timeout=(self.connect_timeout, self.timeout)
+            )
+        finally:
+            body.close()
     
-    def detect_image(self, image_path):
+    def detect_image(self, image):
         """Отправка изображения на удаленный сервер для обработки"""
         try:
             api_url = f"{self.base_url}/detect_images"
             
-            with open(image_path, 'rb') as f:
-                response = self.session.post(
-                    api_url,
-                    files={'file': f},
-                    timeout=(30, self.timeout)
-                )
+            response = self._post_file(api_url, image)
             
             response.raise_for_status()
             data = response.json()
@@ -49,17 +171,12 @@ class APIClient:
         except Exception as e:
             raise Exception(f"Ошибка обработки ответа сервера: {str(e)}")
         
-    def detect_only(self, image_path):
+    def detect_only(self, image):
         """Отправка изображения на удаленный сервер для обработки"""
         try:
             api_url = f"{self.base_url}/detect_only"
             
-            with open(image_path, 'rb') as f:
-                response = self.session.post(
-                    api_url,
-                    files={'file': f},
-                    timeout=(30, self.timeout)
-                )
+            response = self._post_file(api_url, image)
             
             response.raise_for_status()
             data = response.json()
@@ -73,4 +190,30 @@ class APIClient:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Ошибка соединения с сервером {self.base_url}: {str(e)}")
         except Exception as e:
-            raise Exception(f"Ошибка обработки ответа сервера: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Ошибка обработки ответа сервера: {str(e)}")
+
+
+# Общий для процесса клиент: сессия и пул соединений переиспользуются
+# между запросами (keep-alive), а не создаются заново каждый раз
+_api_client = None
+_api_client_lock = threading.Lock()
+
+
+def get_api_client():
+    """Возвращает общий для процесса APIClient"""
+    global _api_client
+    if _api_client is None:
+        with _api_client_lock:
+            if _api_client is None:
+                _api_client = APIClient()
+    return _api_client
+
+
+def reset_api_client():
+    """Сбрасывает общий клиент (после fork соединения родителя использовать нельзя)"""
+    global _api_client, _api_client_lock
+    _api_client = None
+    _api_client_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=reset_api_client)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RecognitionImagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recognition_images'
+
+    def ready(self):
+        from . import signals  # noqa: F401
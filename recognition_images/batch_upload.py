@@ -0,0 +1,62 @@
+import os
+import zipfile
+
+from django.conf import settings
+from django.core.files import File
+
+# Какие файлы принимаются в пакетной загрузке (как у формы загрузки)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+class BatchUploadError(Exception):
+    """Пакет нельзя принять (слишком много файлов, битый архив и т.п.)"""
+
+
+def iter_batch_files(uploaded_files, skipped):
+    """Перебирает схемы пакета: (имя, файл) для каждого изображения.
+
+    zip-архивы раскрываются без распаковки на диск - файл архива читается
+    потоком прямо при сохранении в хранилище задач. Имена пропущенных
+    файлов (не изображения) добавляются в skipped.
+    """
+    count = 0
+    for uploaded_file in uploaded_files:
+        if uploaded_file.name.lower().endswith('.zip'):
+            files = _iter_zip(uploaded_file, skipped)
+        elif _is_image(uploaded_file.name):
+            files = [(uploaded_file.name, uploaded_file)]
+        else:
+            skipped.append(uploaded_file.name)
+            continue
+
+        for name, file in files:
+            count += 1
+            if count > settings.BATCH_MAX_FILES:
+                raise BatchUploadError(f"В пакете больше {settings.BATCH_MAX_FILES} файлов")
+            yield name, file
+
+
+def _iter_zip(uploaded_file, skipped):
+    try:
+        archive = zipfile.ZipFile(uploaded_file)
+    except zipfile.BadZipFile:
+        raise BatchUploadError(f"Не удалось открыть архив {uploaded_file.name}")
+
+    with archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            # Каталоги и служебные файлы (macOS кладет их в __MACOSX/)
+            if info.is_dir() or not name or name.startswith('.') or info.filename.startswith('__MACOSX/'):
+                continue
+            if not _is_image(name):
+                skipped.append(info.filename)
+                continue
+            if info.file_size > settings.BATCH_MAX_FILE_SIZE:
+                raise BatchUploadError(f"Файл {info.filename} в архиве слишком большой")
+
+            with archive.open(info) as member:
+                yield name, File(member, name=name)
+
+
+def _is_image(name):
+    return name.lower().endswith(IMAGE_EXTENSIONS)
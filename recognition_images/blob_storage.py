@@ -0,0 +1,145 @@
+import base64
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from PIL import Image, features
+
+# Расширения файлов для форматов, которые определяет Pillow
+FORMAT_EXTENSIONS = {
+    'PNG': 'png',
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+    'GIF': 'gif',
+    'BMP': 'bmp',
+    'TIFF': 'tif',
+}
+
+MIME_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'webp': 'image/webp',
+    'gif': 'image/gif',
+    'bmp': 'image/bmp',
+    'tif': 'image/tiff',
+}
+
+
+def decode_base64_image(image_base64):
+    """Декодирует base64 строку (в том числе data URI) в байты"""
+    if not image_base64:
+        return b''
+
+    if isinstance(image_base64, bytes):
+        image_base64 = image_base64.decode('ascii')
+
+    image_base64 = image_base64.strip()
+    if 'base64,' in image_base64:
+        image_base64 = image_base64.split('base64,', 1)[1]
+
+    return base64.b64decode(image_base64)
+
+
+class BlobStorage:
+    """Content-addressed хранилище изображений в MEDIA_ROOT.
+
+    Ключ файла - SHA-256 от его содержимого плюс расширение, поэтому
+    одинаковые изображения хранятся на диске один раз.
+    """
+
+    def __init__(self, location=None, base_url=None):
+        self.storage = FileSystemStorage(
+            location=location or settings.BLOB_STORAGE_ROOT,
+            base_url=base_url or settings.BLOB_STORAGE_URL,
+        )
+
+    @staticmethod
+    def make_key(data, extension):
+        """Ключ файла по его содержимому"""
+        return f"{hashlib.sha256(data).hexdigest()}.{extension}"
+
+    @staticmethod
+    def name_for_key(key):
+        """Относительный путь файла в хранилище (раскладываем по подкаталогам)"""
+        return f"{key[:2]}/{key[2:4]}/{key}"
+
+    def save(self, data):
+        """Сохраняет байты изображения, возвращает (key, width, height)"""
+        with Image.open(BytesIO(data)) as image:
+            width, height = image.size
+            extension = FORMAT_EXTENSIONS.get(image.format, 'bin')
+
+        key = self.make_key(data, extension)
+        self._save_once(self.name_for_key(key), data)
+        return key, width, height
+
+    def save_thumbnail(self, key, size=None, image_format=None):
+        """Создает миниатюру изображения, возвращает ключ миниатюры.
+
+        Ключ миниатюры строится из хэша исходника и параметров, поэтому
+        повторный вызов для того же изображения не пересчитывает файл.
+        """
+        size = size or settings.THUMBNAIL_SIZE
+        image_format = (image_format or settings.THUMBNAIL_FORMAT).upper()
+        if image_format == 'WEBP' and not features.check('webp'):
+            image_format = 'JPEG'
+
+        source_hash = key.split('.', 1)[0]
+        thumbnail_key = f"{source_hash}_{size}.{FORMAT_EXTENSIONS[image_format]}"
+        name = self.name_for_key(thumbnail_key)
+        if self.storage.exists(name):
+            return thumbnail_key
+
+        with self.storage.open(self.name_for_key(key), 'rb') as f, Image.open(f) as image:
+            image.thumbnail((size, size))
+            if image_format == 'JPEG' and image.mode != 'RGB':
+                image = image.convert('RGB')
+            elif image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+
+            buffer = BytesIO()
+            image.save(buffer, format=image_format, quality=settings.THUMBNAIL_QUALITY)
+
+        self._save_once(name, buffer.getvalue())
+        return thumbnail_key
+
+    def _save_once(self, name, data):
+        """Записывает файл, если его еще нет в хранилище"""
+        if self.storage.exists(name):
+            return
+
+        saved_name = self.storage.save(name, ContentFile(data))
+        # Параллельный запрос мог успеть записать тот же файл -
+        # тогда хранилище выдаст другое имя, и копия не нужна
+        if saved_name != name:
+            self.storage.delete(saved_name)
+
+    def exists(self, key):
+        return bool(key) and self.storage.exists(self.name_for_key(key))
+
+    def path(self, key):
+        return self.storage.path(self.name_for_key(key))
+
+    def url(self, key):
+        return self.storage.url(self.name_for_key(key))
+
+    def read(self, key):
+        """Читает байты изображения по ключу"""
+        with self.storage.open(self.name_for_key(key), 'rb') as f:
+            return f.read()
+
+    def delete(self, key):
+        if key:
+            self.storage.delete(self.name_for_key(key))
+
+    def to_data_uri(self, key):
+        """Собирает data URI из сохраненного файла (для обратной совместимости)"""
+        extension = key.rsplit('.', 1)[-1]
+        mime_type = MIME_TYPES.get(extension, 'application/octet-stream')
+        encoded = base64.b64encode(self.read(key)).decode('ascii')
+        return f"data:{mime_type};base64,{encoded}"
+
+
+blob_storage = BlobStorage()
@@ -0,0 +1,72 @@
+import itertools
+import os
+import pickle
+import zlib
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class LRUFileBasedCache(FileBasedCache):
+    """Файловый кэш с ограничением размера и вытеснением по LRU.
+
+    Общий для всех воркеров, как и FileBasedCache, но при переполнении
+    удаляются давно не читанные записи, а не случайная треть: mtime файла -
+    время последнего использования, get() его обновляет. Каталог
+    перечисляется не на каждой записи, а раз в CULL_CHECK_INTERVAL записей
+    процесса (OPTIONS), поэтому между проверками размер может превысить
+    MAX_ENTRIES на это число записей от каждого воркера.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS', {})
+        self._cull_check_interval = max(1, int(options.get('CULL_CHECK_INTERVAL', 50)))
+        self._writes = itertools.count(1)
+
+    def get(self, key, default=None, version=None):
+        fname = self._key_to_file(key, version)
+        try:
+            with open(fname, 'rb') as f:
+                if not self._is_expired(f):
+                    value = pickle.loads(zlib.decompress(f.read()))
+                    self._mark_used(fname)
+                    return value
+        except FileNotFoundError:
+            pass
+        return default
+
+    @staticmethod
+    def _mark_used(fname):
+        try:
+            os.utime(fname)
+        except OSError:
+            # Запись удалили между чтением и обновлением времени
+            pass
+
+    def _cull(self):
+        if next(self._writes) % self._cull_check_interval:
+            return
+
+        entries = []
+        try:
+            with os.scandir(self._dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.cache_suffix):
+                        continue
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        continue
+        except FileNotFoundError:
+            return
+        if len(entries) < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            # Как в FileBasedCache: CULL_FREQUENCY = 0 очищает кэш целиком
+            return self.clear()
+
+        # Оставляем (1 - 1/CULL_FREQUENCY) от MAX_ENTRIES самых свежих записей
+        keep = self._max_entries - self._max_entries // self._cull_frequency
+        entries.sort()
+        for _, path in entries[:len(entries) - keep]:
+            self._delete(path)
@@ -1,58 +1,68 @@
-import json
+class ItemTable:
+    """Общая таблица кандидатов страницы результатов.
+
+    Каждый товар {id, name, price} хранится в ней один раз и выводится
+    в страницу одним JSON, а option комбобоксов ссылаются на него по
+    индексу вместо собственной копии JSON.
+    """
+
+    def __init__(self):
+        self.items = []
+        self._indexes = {}
+
+    def add(self, item):
+        """Добавляет товар (если его еще нет) и возвращает его индекс"""
+        key = (item['id'], item['name'], item['price'])
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = len(self.items)
+            self.items.append({'id': item['id'], 'name': item['name'], 'price': item['price']})
+        return index
+
 
 class CategoryManager:
-    def __init__(self, category_name):
+    def __init__(self, category_name, item_table):
         self.category_name = category_name
+        self.item_table = item_table
         self.items = []  # Все элементы категории
-    
+
     def add_item_group(self, item_group):
         """Добавляет группу элементов в категорию"""
         if not item_group or not isinstance(item_group, list):
             return
-            
+
         for item in item_group:
             if not isinstance(item, dict):
                 continue
-                
+
             self.items.append({
                 'id': item.get('id', ''),
                 'name': item.get('name', ''),
                 'price': item.get('price', '')
             })
-    
+
     def prepare_for_template(self):
-        """Подготавливает данные для шаблона в плоском формате"""
+        """Подготавливает данные для шаблона в плоском формате.
+
+        Одна запись на товар: шаблон выводит из нее все три комбобокса
+        (артикул, название, цена), value - индекс товара в item_table.
+        """
         if not self.items:
             return None
-            
-        article_options = []
-        name_options = []
-        price_options = []
-        
-        for item in self.items:
-            item_data = {
-                'id': item['id'],
+
+        # value строкой: число шаблон прогнал бы через локализацию
+        # (медленно и с риском разделителя тысяч)
+        options = [
+            {
+                'value': str(self.item_table.add(item)),
+                'article': item['id'],
                 'name': item['name'],
-                'price': item['price']
+                'price': f"{item['price']} руб."
             }
-            json_data = json.dumps(item_data, ensure_ascii=False)
-            
-            article_options.append({
-                'value': json_data,
-                'text': item['id']
-            })
-            name_options.append({
-                'value': json_data,
-                'text': item['name']
-            })
-            price_options.append({
-                'value': json_data,
-                'text': f"{item['price']} руб."
-            })
-        
+            for item in self.items
+        ]
+
         return {
             'name': self.category_name,
-            'article_options': article_options,
-            'name_options': name_options,
-            'price_options': price_options
-        }
\ No newline at end of file
+            'options': options
+        }
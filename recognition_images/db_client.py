@@ -1,17 +1,31 @@
 import os
+import json
+import threading
+import hashlib
 import requests
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple
 from urllib.parse import quote
 import logging
+from django.conf import settings
+from django.core.cache import caches
 
 # Ваш существующий класс QF или его аналог
 # Если у вас нет QF класса, можно использовать словарь
 
 logger = logging.getLogger(__name__)
 
+# Алиас кэша из settings.CACHES для результатов поиска в каталоге
+DB_SEARCH_CACHE_ALIAS = 'catalog'
+
 class DBClient:
-    def __init__(self, base_url: str = None):
-        self.base_url = base_url or os.getenv("DB_API_URL", "http://213.172.24.109:8001")
+    def __init__(self, base_url: str = None, max_workers: int = None):
+        self.base_url = base_url or settings.DB_API_URL
+        self.timeout = settings.DB_API_TIMEOUT
+        # Сколько запросов к каталогу выполняется одновременно
+        self.max_workers = max_workers or getattr(settings, 'DB_SEARCH_CONCURRENCY', 8)
+        # Общий для всех запросов кэш результатов поиска в каталоге
+        self.cache = caches[DB_SEARCH_CACHE_ALIAS]
         self.session = requests.Session()
         self.session.headers.update({
             'Accept': 'application/json',
@@ -27,36 +41,24 @@ class DBClient:
             backoff_factor=0.1,
             status_forcelist=[500, 502, 503, 504]
         )
-        adapter = HTTPAdapter(max_retries=retry)
+        # Пул соединений не меньше числа потоков, иначе лишние соединения не переиспользуются
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=max(self.max_workers, settings.HTTP_POOL_MAXSIZE)
+        )
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
 
     def search_breakers(self, qf_params: Dict) -> List[Dict]:
         """Поиск автоматических выключателей по параметрам"""
         try:
-            # Поддерживаем как QF объект, так и словарь
-            if hasattr(qf_params, 'ID_QF'):
-                # Это QF объект
-                params = {
-                    "ID_QF": qf_params.ID_QF if qf_params.ID_QF else '',
-                    "Current": qf_params.Current if qf_params.Current else '',
-                    "Voltage": qf_params.Voltage if qf_params.Voltage else '',
-                    "Current_Close": qf_params.Current_Close if qf_params.Current_Close else '',
-                    "Mounting_Type": qf_params.Mounting_Type if qf_params.Mounting_Type else '',
-                    "Name": qf_params.Name if qf_params.Name else '',
-                    "Polus": qf_params.Polus if qf_params.Polus else ''
-                }
-            else:
-                # Это словарь с параметрами
-                params = {
-                    "ID_QF": str(qf_params.get("id_qf", "")),
-                    "Current": str(qf_params.get("current", "")),
-                    "Voltage": str(qf_params.get("voltage", "")),
-                    "Current_Close": str(qf_params.get("current_close", "")),
-                    "Mounting_Type": str(qf_params.get("mounting_type", "")),
-                    "Name": str(qf_params.get("name", "")),
-                    "Polus": str(qf_params.get("polus", ""))
-                }
+            params = self._normalize_params(self._breaker_params(qf_params))
+            
+            cache_key = self._cache_key('breakers', params)
+            data = self.cache.get(cache_key)
+            if data is not None:
+                return data
             
             # Кодируем для URL
             encoded_params = {k: quote(str(v)) for k, v in params.items()}
@@ -66,18 +68,46 @@ class DBClient:
             response = self.session.get(
                 f"{self.base_url}/breakers",
                 params=encoded_params,
-                timeout=30
+                timeout=self.timeout
             )
             response.raise_for_status()
             
             data = response.json().get("data", [])
             logger.debug(f"Найдено выключателей: {len(data)}")
+            self.cache.set(cache_key, data)
             return data
             
         except Exception as e:
             logger.error(f"Ошибка поиска выключателей: {str(e)}")
             return []
 
+    @staticmethod
+    def _breaker_params(qf_params) -> Dict:
+        """Параметры запроса выключателей из QF объекта или словаря"""
+        # Поддерживаем как QF объект, так и словарь
+        if hasattr(qf_params, 'ID_QF'):
+            # Это QF объект
+            return {
+                "ID_QF": qf_params.ID_QF if qf_params.ID_QF else '',
+                "Current": qf_params.Current if qf_params.Current else '',
+                "Voltage": qf_params.Voltage if qf_params.Voltage else '',
+                "Current_Close": qf_params.Current_Close if qf_params.Current_Close else '',
+                "Mounting_Type": qf_params.Mounting_Type if qf_params.Mounting_Type else '',
+                "Name": qf_params.Name if qf_params.Name else '',
+                "Polus": qf_params.Polus if qf_params.Polus else ''
+            }
+        
+        # Это словарь с параметрами
+        return {
+            "ID_QF": str(qf_params.get("id_qf", "")),
+            "Current": str(qf_params.get("current", "")),
+            "Voltage": str(qf_params.get("voltage", "")),
+            "Current_Close": str(qf_params.get("current_close", "")),
+            "Mounting_Type": str(qf_params.get("mounting_type", "")),
+            "Name": str(qf_params.get("name", "")),
+            "Polus": str(qf_params.get("polus", ""))
+        }
+
     def search_transformators(self, params: Dict = None, limit: int = 10) -> List[Dict]:
         """Поиск трансформаторов"""
         try:
@@ -86,18 +116,25 @@ class DBClient:
             # Если переданы дополнительные параметры
             if params:
                 query_params.update(params)
+            query_params = self._normalize_params(query_params)
+            
+            cache_key = self._cache_key('transformators', query_params)
+            data = self.cache.get(cache_key)
+            if data is not None:
+                return data
             
             logger.debug(f"Поиск трансформаторов с параметрами: {query_params}")
             
             response = self.session.get(
                 f"{self.base_url}/transformators",
                 params=query_params,
-                timeout=30
+                timeout=self.timeout
             )
             response.raise_for_status()
             
             data = response.json().get("data", [])
             logger.debug(f"Найдено трансформаторов: {len(data)}")
+            self.cache.set(cache_key, data)
             return data
             
         except Exception as e:
@@ -112,18 +149,25 @@ class DBClient:
             # Если переданы дополнительные параметры
             if params:
                 query_params.update(params)
+            query_params = self._normalize_params(query_params)
+            
+            cache_key = self._cache_key('counters', query_params)
+            data = self.cache.get(cache_key)
+            if data is not None:
+                return data
             
             logger.debug(f"Поиск счетчиков с параметрами: {query_params}")
             
             response = self.session.get(
                 f"{self.base_url}/counters",
                 params=query_params,
-                timeout=30
+                timeout=self.timeout
             )
             response.raise_for_status()
             
             data = response.json().get("data", [])
             logger.debug(f"Найдено счетчиков: {len(data)}")
+            self.cache.set(cache_key, data)
             return data
             
         except Exception as e:
@@ -142,4 +186,88 @@ class DBClient:
             return search_methods[element_type](params or {})
         else:
             logger.warning(f"Неизвестный тип элемента: {element_type}")
-            return []
\ No newline at end of file
+            return []
+
+    def search_batch(self, queries: List[Tuple[str, Dict]]) -> List:
+        """Параллельный поиск по списку запросов (element_type, params).
+
+        Результаты возвращаются в том же порядке, что и запросы. Если поиск
+        для элемента упал, на месте его результата стоит исключение, чтобы
+        вызывающий код мог сообщить об ошибке для конкретного элемента.
+        """
+        if not queries:
+            return []
+
+        # Одинаковые запросы (например, несколько одинаковых QF на схеме)
+        # выполняем один раз
+        query_keys = [self._query_key(element_type, params) for element_type, params in queries]
+        unique_queries = dict(zip(query_keys, queries))
+
+        workers = min(self.max_workers, len(unique_queries))
+        if workers <= 1:
+            results = [self._search_or_error(*query) for query in unique_queries.values()]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda query: self._search_or_error(*query), unique_queries.values()))
+
+        results_by_key = dict(zip(unique_queries.keys(), results))
+        return [
+            list(results_by_key[key]) if isinstance(results_by_key[key], list) else results_by_key[key]
+            for key in query_keys
+        ]
+
+    def _search_or_error(self, element_type: str, params: Dict):
+        """Поиск, который возвращает исключение вместо того, чтобы его выбросить"""
+        try:
+            return self.search_by_type(element_type, params)
+        except Exception as e:
+            logger.error(f"Ошибка поиска ({element_type}): {str(e)}")
+            return e
+
+    def _query_key(self, element_type: str, params) -> str:
+        """Нормализованный ключ запроса для поиска дублей"""
+        if element_type == 'QF':
+            params = self._breaker_params(params or {})
+        return self._cache_key(element_type, self._normalize_params(params or {}))
+
+    @staticmethod
+    def _normalize_params(params: Dict) -> Dict:
+        """Параметры запроса в том виде, в котором они уходят в API и в ключ кэша"""
+        return {str(k): str(v).strip() for k, v in params.items()}
+
+    @staticmethod
+    def _cache_key(endpoint: str, params: Dict) -> str:
+        """Ключ кэша по нормализованным параметрам (см. _normalize_params)"""
+        digest = hashlib.sha1(
+            json.dumps(sorted(params.items()), ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        return f"db_search:{endpoint}:{digest}"
+
+    def clear_cache(self):
+        """Сбрасывает кэш поиска (после обновления каталога)"""
+        self.cache.clear()
+
+
+# Общий для процесса клиент каталога (см. api_client.get_api_client)
+_db_client = None
+_db_client_lock = threading.Lock()
+
+
+def get_db_client() -> DBClient:
+    """Возвращает общий для процесса DBClient"""
+    global _db_client
+    if _db_client is None:
+        with _db_client_lock:
+            if _db_client is None:
+                _db_client = DBClient()
+    return _db_client
+
+
+def reset_db_client():
+    """Сбрасывает общий клиент (после fork соединения родителя использовать нельзя)"""
+    global _db_client, _db_client_lock
+    _db_client = None
+    _db_client_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=reset_db_client)
@@ -8,6 +8,8 @@ class UploadFileForm(forms.Form):
             'class': 'file-input'
         })
     )
+    # Распознать заново, даже если такой файл уже загружался
+    force_refresh = forms.BooleanField(required=False)
 
 class EditDetectionForm(forms.Form):
     elements = forms.JSONField(widget=forms.HiddenInput())
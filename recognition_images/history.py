@@ -0,0 +1,103 @@
+import base64
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import models
+
+# Алиас кэша из settings.CACHES для счетчиков истории. Кэш общий для
+# воркеров: сброс после изменения результатов должен быть виден всем
+HISTORY_CACHE_ALIAS = 'history'
+
+
+class HistoryCursorError(ValueError):
+    """Курсор страницы истории поврежден или подделан"""
+
+
+def encode_cursor(result):
+    """Курсор следующей страницы: (created_at, id) последнего результата"""
+    raw = f"{result.created_at.isoformat()}|{result.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise HistoryCursorError('Неверный курсор')
+    if created_at is None:
+        raise HistoryCursorError('Неверный курсор')
+    return created_at, pk
+
+
+def history_queryset(user, favorites=False):
+    """Результаты пользователя за HISTORY_DAYS дней, новые сначала.
+
+    Порядок (-created_at, -id) совпадает с индексом detect_user_created_idx
+    (detect_user_fav_created_idx для избранного), поэтому страница читается
+    из индекса без сортировки всей истории.
+    """
+    queryset = models.DetectionResult.objects.summary().filter(
+        user=user,
+        created_at__gte=timezone.now() - timedelta(days=settings.HISTORY_DAYS)
+    )
+    if favorites:
+        queryset = queryset.filter(is_favorite=True)
+    return queryset.order_by('-created_at', '-id')
+
+
+def history_page(user, cursor=None, favorites=False, page_size=None):
+    """Страница истории после курсора: (результаты, курсор следующей страницы или None).
+
+    Keyset-пагинация: вместо OFFSET условие "строго после последней
+    показанной строки", поэтому глубокие страницы не дороже первой, а
+    новые результаты не сдвигают уже загруженные.
+    """
+    page_size = page_size or settings.HISTORY_PAGE_SIZE
+    queryset = history_queryset(user, favorites)
+
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    results = list(queryset[:page_size + 1])
+    if len(results) > page_size:
+        results = results[:page_size]
+        return results, encode_cursor(results[-1])
+    return results, None
+
+
+def _count_cache_key(user_id, favorites):
+    return f"history_count:{user_id}:{int(favorites)}"
+
+
+def result_count(user, favorites=False):
+    """Число результатов в истории пользователя (кэшируется до изменений)"""
+    cache = caches[HISTORY_CACHE_ALIAS]
+    key = _count_cache_key(user.pk, favorites)
+    count = cache.get(key)
+    if count is None:
+        count = history_queryset(user, favorites).count()
+        # Срок жизни ограничен: результаты выпадают из окна HISTORY_DAYS
+        cache.set(key, count, settings.HISTORY_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_result_count(*user_ids):
+    """Сбрасывает кэш счетчиков после добавления, удаления или переноса результатов"""
+    keys = [
+        _count_cache_key(user_id, favorites)
+        for user_id in user_ids if user_id is not None
+        for favorites in (False, True)
+    ]
+    if keys:
+        caches[HISTORY_CACHE_ALIAS].delete_many(keys)
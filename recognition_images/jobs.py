@@ -0,0 +1,284 @@
+import copy
+import hashlib
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import access, api_client, history, models
+from .blob_storage import decode_base64_image
+from .preprocessing import prepare_or_original
+
+logger = logging.getLogger(__name__)
+
+
+def create_detection_job(user, session_key, uploaded_file, store_file=True,
+                         batch_id='', page_number=None, source_name='', save=True,
+                         content_hash='', force_refresh=False):
+    """Ставит загруженный файл в очередь на распознавание.
+
+    store_file=False - файл не копируется в хранилище задачи, его передадут
+    в run_detection_job напрямую (распознавание внутри запроса).
+    save=False - задача не записывается в БД (для bulk_create пакета).
+
+    Если передан content_hash и этот владелец уже загружал такой же файл
+    (не раньше DETECTION_REUSE_TTL секунд назад), задача сразу завершается
+    копией прошлого результата (только при save=True). force_refresh=True -
+    распознать заново.
+    """
+    job = models.DetectionJob(
+        job_id=str(uuid.uuid4()),
+        user=user,
+        session_key=session_key,
+        batch_id=batch_id,
+        page_number=page_number,
+        source_name=source_name[:255],
+        content_hash=content_hash,
+    )
+    if content_hash and not force_refresh and save:
+        previous_result = find_previous_result(user, session_key, content_hash)
+        if previous_result is not None:
+            detection_result = clone_detection_result(previous_result, job)
+            detection_result.save()
+            _finish_job(job, detection_result)
+            job.save()
+            logger.info(f"Файл задачи {job.job_id} уже распознавался, результат {previous_result.result_id} скопирован")
+            return job
+
+    if store_file:
+        file_name = os.path.basename(uploaded_file.name or 'upload')
+        job.file.save(f"{job.job_id}_{file_name}", uploaded_file, save=False)
+    if save:
+        job.save()
+    return job
+
+
+def file_content_hash(uploaded_file):
+    """SHA-256 содержимого загруженного файла (читается по частям)"""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def find_previous_result(user, session_key, content_hash):
+    """Последний результат этого владельца для файла с тем же содержимым.
+
+    Права те же, что у списка результатов: пользователь видит только свои
+    результаты, анонимная сессия - только результаты без пользователя.
+    """
+    if not settings.DETECTION_REUSE_TTL:
+        return None
+
+    owner_filter = {'user': user} if user is not None else {
+        'user__isnull': True,
+        'session_key': session_key,
+    }
+    return models.DetectionResult.objects.filter(
+        content_hash=content_hash,
+        created_at__gte=timezone.now() - timedelta(seconds=settings.DETECTION_REUSE_TTL),
+        **owner_filter
+    ).order_by('-created_at').first()
+
+
+def clone_detection_result(source, job):
+    """Новый результат (без сохранения) с распознаванием из source.
+
+    Берется исходный detected_data, правки и поиск по каталогу не
+    копируются. Изображение в blob_storage общее - ключи те же.
+    """
+    name = f"Результат от {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+    return models.DetectionResult(
+        user_id=job.user_id,
+        session_key=job.session_key,
+        result_id=str(uuid.uuid4()),
+        detected_data=copy.deepcopy(source.detected_data),
+        is_edited=False,
+        name=name,
+        image_key=source.image_key,
+        image_width=source.image_width,
+        image_height=source.image_height,
+        thumbnail_key=source.thumbnail_key,
+        source_scale=source.source_scale,
+        content_hash=source.content_hash,
+    )
+
+
+def claim_next_job():
+    """Забирает следующую задачу из очереди.
+
+    SELECT ... FOR UPDATE SKIP LOCKED позволяет нескольким воркерам
+    разбирать очередь параллельно, не блокируя друг друга. Задачи,
+    зависшие в обработке дольше DETECTION_JOB_TIMEOUT (например, воркер
+    упал), возвращаются в работу, пока не исчерпан лимит попыток.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.DETECTION_JOB_TIMEOUT)
+
+    with transaction.atomic():
+        job = models.DetectionJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status=models.DetectionJob.STATUS_PENDING) |
+            Q(status=models.DetectionJob.STATUS_PROCESSING, started_at__lt=stale_before),
+            attempts__lt=settings.DETECTION_JOB_MAX_ATTEMPTS,
+        ).order_by('created_at').first()
+
+        if job is None:
+            return None
+
+        job.status = models.DetectionJob.STATUS_PROCESSING
+        job.started_at = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'attempts'])
+
+    return job
+
+
+def fail_stale_jobs():
+    """Помечает ошибкой зависшие задачи, у которых кончились попытки"""
+    stale_before = timezone.now() - timedelta(seconds=settings.DETECTION_JOB_TIMEOUT)
+    return models.DetectionJob.objects.filter(
+        status=models.DetectionJob.STATUS_PROCESSING,
+        started_at__lt=stale_before,
+        attempts__gte=settings.DETECTION_JOB_MAX_ATTEMPTS,
+    ).update(
+        status=models.DetectionJob.STATUS_FAILED,
+        error='Превышено время ожидания распознавания',
+        finished_at=timezone.now(),
+    )
+
+
+def run_detection_job(job, uploaded_file=None):
+    """Отправляет файл задачи в нейросеть и сохраняет результат.
+
+    Файл уходит в API потоком: либо переданный UploadedFile без
+    промежуточных копий, либо файл задачи из хранилища.
+    """
+    detection_result = _detect(job, uploaded_file)
+    if not isinstance(detection_result, Exception):
+        try:
+            detection_result.save()
+        except Exception as e:
+            detection_result = e
+
+    _finish_job(job, detection_result)
+    job.save()
+    return job
+
+
+def run_detection_batch(job_list):
+    """Выполняет задачи пакета (страницы PDF, файлы архива).
+
+    Запросы к нейросети идут параллельно, не больше DETECTION_CONCURRENCY,
+    а результаты и статусы задач записываются в БД одной пачкой.
+    """
+    workers = min(settings.DETECTION_CONCURRENCY, len(job_list))
+    if workers <= 1:
+        outcomes = [_detect(job) for job in job_list]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='detection') as executor:
+            outcomes = list(executor.map(_detect, job_list))
+
+    for job, outcome in zip(job_list, outcomes):
+        _finish_job(job, outcome)
+
+    results = [outcome for outcome in outcomes if not isinstance(outcome, Exception)]
+    with transaction.atomic():
+        models.DetectionResult.objects.bulk_create(results)
+        models.DetectionJob.objects.bulk_update(
+            job_list, ['status', 'result_id', 'error', 'file', 'finished_at']
+        )
+    # bulk_create не отправляет сигналы post_save
+    history.invalidate_result_count(*{job.user_id for job in job_list})
+    access.remember_results(results)
+    return job_list
+
+
+def _detect(job, uploaded_file=None):
+    """Распознает файл задачи, возвращает несохраненный DetectionResult или исключение.
+
+    Здесь нет запросов к БД, поэтому функцию можно вызывать из потоков.
+    """
+    try:
+        api = api_client.get_api_client()
+        if uploaded_file is not None:
+            prepared, scale = prepare_or_original(uploaded_file)
+            api_response = api.detect_only(prepared)
+        else:
+            with job.file.open('rb') as job_file:
+                prepared, scale = prepare_or_original(job_file)
+                api_response = api.detect_only(prepared)
+
+        return build_detection_result(
+            job.user_id, job.session_key, api_response,
+            batch_id=job.batch_id, page_number=job.page_number,
+            source_name=job.source_name, source_scale=scale,
+            content_hash=job.content_hash
+        )
+    except Exception as e:
+        return e
+
+
+def _finish_job(job, outcome):
+    """Проставляет задаче итоговый статус (без сохранения)"""
+    if isinstance(outcome, Exception):
+        logger.error(f"Ошибка выполнения задачи {job.job_id}: {str(outcome)}")
+        job.status = models.DetectionJob.STATUS_FAILED
+        job.error = str(outcome)
+    else:
+        job.status = models.DetectionJob.STATUS_DONE
+        job.result_id = outcome.result_id
+        job.error = ''
+        logger.info(f"Задача {job.job_id} выполнена, результат {job.result_id}")
+
+    # Исходный файл больше не нужен
+    if job.file:
+        job.file.delete(save=False)
+    job.finished_at = timezone.now()
+
+
+def create_detection_result(user, session_key, api_response, batch_id='', page_number=None):
+    """Создает DetectionResult по ответу API распознавания"""
+    detection_result = build_detection_result(
+        user.pk if user else None, session_key, api_response,
+        batch_id=batch_id, page_number=page_number
+    )
+    detection_result.save()
+    return detection_result
+
+
+def build_detection_result(user_id, session_key, api_response, batch_id='', page_number=None,
+                           source_name='', source_scale=1.0, content_hash=''):
+    """DetectionResult по ответу API (изображение уже в хранилище, строка в БД - нет)"""
+    name = f"Результат от {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+    if page_number:
+        name = f"{name} (стр. {page_number})"
+    elif source_name:
+        name = f"{name} ({source_name})"
+
+    detection_result = models.DetectionResult(
+        user_id=user_id,
+        session_key=session_key,
+        result_id=str(uuid.uuid4()),
+        detected_data=api_response['detection_results'],
+        is_edited=False,
+        name=name[:255],
+        batch_id=batch_id,
+        page_number=page_number,
+        source_scale=source_scale,
+        content_hash=content_hash
+    )
+
+    try:
+        image_data = decode_base64_image(api_response['image_base64'])
+        if image_data:
+            detection_result.set_image(image_data)
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить изображение результата {detection_result.result_id}: {e}")
+
+    return detection_result
@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recognition_images.pdf_assets import pdf_assets
+from recognition_images.pdf_render import PDF_BACKENDS, PDFRenderError, get_pdf_backend, render_offer_pdf
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время генерации PDF коммерческого предложения разными бэкендами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend',
+            action='append',
+            choices=sorted(PDF_BACKENDS),
+            help='Бэкенд для замера (можно указать несколько раз), по умолчанию все'
+        )
+        parser.add_argument('--runs', type=int, default=20, help='Сколько PDF создать каждым бэкендом')
+        parser.add_argument('--elements', type=int, default=40, help='Сколько строк в таблице товаров')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs должно быть больше 0')
+
+        context = {'data': self._sample_data(options['elements']), **pdf_assets.get_context()}
+
+        for name in options['backend'] or sorted(PDF_BACKENDS):
+            try:
+                get_pdf_backend(name)
+            except (PDFRenderError, ImportError, OSError) as e:
+                self.stdout.write(self.style.WARNING(f"{name}: пропущен ({e})"))
+                continue
+
+            # Первый PDF не учитываем: в нем загрузка шрифтов и шаблона
+            size = len(render_offer_pdf(context, name))
+            timings = []
+            for _ in range(options['runs']):
+                started = time.perf_counter()
+                render_offer_pdf(context, name)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(
+                f"{name}: p50 {self._percentile(timings, 50):.0f} мс, "
+                f"p95 {self._percentile(timings, 95):.0f} мс, "
+                f"среднее {statistics.mean(timings):.0f} мс, {size / 1024:.0f} КБ"
+            )
+
+    @staticmethod
+    def _percentile(values, percent):
+        values = sorted(values)
+        index = round((len(values) - 1) * percent / 100)
+        return values[index]
+
+    @staticmethod
+    def _sample_data(count):
+        """Данные в том же формате, что отправляет static/js/modules_for_results/pdf.js"""
+        elements = [
+            {
+                'number': i + 1,
+                'article': f'ART-{i + 1:04d}',
+                'name': f'Автоматический выключатель {i + 1}',
+                'price': f'{1000 + i * 10:.2f} руб.',
+                'quantity': 1 + i % 3,
+            }
+            for i in range(count)
+        ]
+        return {
+            'categories': [{'name': 'Автоматические выключатели', 'elements': elements}],
+            'total': '0.00 руб.',
+            'total_without_vat': '0.00 руб.',
+            'vat_amount': '0.00 руб.',
+            'total_with_vat': '0.00 руб.',
+        }
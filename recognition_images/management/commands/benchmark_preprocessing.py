@@ -0,0 +1,89 @@
+import time
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw
+
+from recognition_images.api_client import get_api_client
+from recognition_images.preprocessing import prepare_for_detection
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет подготовку изображений перед распознаванием: сколько байт '
+        'уходит в нейросеть и сколько времени занимает запрос для разных размеров фото'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--megapixels',
+            default='2,8,12,24',
+            help='Размеры тестовых снимков в мегапикселях через запятую'
+        )
+        parser.add_argument('--runs', type=int, default=3, help='Повторов на каждый размер')
+        parser.add_argument(
+            '--send',
+            action='store_true',
+            help='Отправлять изображения в API (замер полного времени запроса)'
+        )
+
+    def handle(self, *args, **options):
+        sizes = [float(value) for value in options['megapixels'].split(',') if value.strip()]
+        api = get_api_client() if options['send'] else None
+
+        for megapixels in sizes:
+            original = self._sample_photo(megapixels)
+
+            prepare_times = []
+            send_times = {'original': [], 'prepared': []}
+            sent_size = 0
+            scale = 1.0
+
+            for _ in range(options['runs']):
+                started = time.perf_counter()
+                prepared, scale = prepare_for_detection(ContentFile(original, name='photo.jpg'))
+                prepare_times.append(time.perf_counter() - started)
+                sent_size = len(prepared.read())
+
+                if api is not None:
+                    for label, data in (('original', original), ('prepared', None)):
+                        started = time.perf_counter()
+                        if data is None:
+                            prepared, _ = prepare_for_detection(ContentFile(original, name='photo.jpg'))
+                            api.detect_only(prepared)
+                        else:
+                            api.detect_only(ContentFile(data, name='photo.jpg'))
+                        send_times[label].append(time.perf_counter() - started)
+
+            line = (
+                f"{megapixels:g} Мп: {len(original) / 1024:.0f} КБ -> {sent_size / 1024:.0f} КБ "
+                f"(scale {scale:.2f}), подготовка {self._median(prepare_times) * 1000:.0f} мс"
+            )
+            if api is not None:
+                line += (
+                    f", запрос без подготовки {self._median(send_times['original']):.2f} с, "
+                    f"с подготовкой {self._median(send_times['prepared']):.2f} с"
+                )
+            self.stdout.write(line)
+
+    @staticmethod
+    def _median(values):
+        values = sorted(values)
+        return values[len(values) // 2]
+
+    @staticmethod
+    def _sample_photo(megapixels):
+        """JPEG 4:3 с повернутым по EXIF снимком, как с телефона"""
+        width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+        height = int(width * 3 / 4)
+        image = Image.effect_noise((width, height), 40).convert('RGB')
+        draw = ImageDraw.Draw(image)
+        for x in range(0, width, 50):
+            draw.line((x, 0, x, height), fill=(20, 20, 20), width=3)
+
+        exif = Image.Exif()
+        exif[0x0112] = 6  # повернуть на 90 градусов
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', quality=92, exif=exif)
+        return buffer.getvalue()
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recognition_images.models import Component
+
+
+class Command(BaseCommand):
+    help = 'Удаляет файлы в media/detection_results, на которые не ссылается ни один компонент'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60,
+            help='Не трогать файлы моложе N минут (их может сейчас сохранять запрос)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, какие файлы будут удалены'
+        )
+
+    def handle(self, *args, **options):
+        field = Component._meta.get_field('image')
+        storage = field.storage
+        directory = field.upload_to.rstrip('/')
+
+        if not storage.exists(directory):
+            self.stdout.write('Каталог с изображениями пуст')
+            return
+
+        referenced = set(
+            Component.objects.exclude(image='').exclude(image__isnull=True)
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        cutoff = timezone.now() - timedelta(minutes=options['min_age'])
+
+        _, file_names = storage.listdir(directory)
+        removed = 0
+        freed = 0
+
+        for file_name in file_names:
+            name = f"{directory}/{file_name}"
+            if name in referenced or storage.get_modified_time(name) > cutoff:
+                continue
+
+            size = storage.size(name)
+            if options['dry_run']:
+                self.stdout.write(f"  {name} ({size} байт)")
+            else:
+                storage.delete(name)
+            removed += 1
+            freed += size
+
+        action = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} файлов: {removed}, {freed / 1024 / 1024:.1f} МБ"
+        ))
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recognition_images.pdf_jobs import PDF_JOBS_DIR
+
+
+class Command(BaseCommand):
+    help = 'Удаляет PDF коммерческих предложений, созданные в фоне, старше заданного возраста'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=24,
+            help='Удалять файлы старше N часов'
+        )
+
+    def handle(self, *args, **options):
+        if not default_storage.exists(PDF_JOBS_DIR):
+            self.stdout.write('Каталог с PDF пуст')
+            return
+
+        cutoff = timezone.now() - timedelta(hours=options['max_age'])
+        _, file_names = default_storage.listdir(PDF_JOBS_DIR)
+        removed = 0
+
+        for file_name in file_names:
+            name = f"{PDF_JOBS_DIR}/{file_name}"
+            if default_storage.get_modified_time(name) < cutoff:
+                default_storage.delete(name)
+                removed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Удалено файлов: {removed}"))
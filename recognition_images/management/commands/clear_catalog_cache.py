@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from recognition_images.db_client import get_db_client
+
+
+class Command(BaseCommand):
+    help = 'Сбрасывает кэш результатов поиска в каталоге (запускать после обновления каталога)'
+
+    def handle(self, *args, **options):
+        get_db_client().clear_cache()
+        self.stdout.write(self.style.SUCCESS('Кэш поиска в каталоге очищен'))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from recognition_images.models import DetectionResult
+
+
+class Command(BaseCommand):
+    help = 'Создает миниатюры для результатов, у которых их еще нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Сколько записей обрабатывать за один проход'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Обработать все результаты (например, после смены THUMBNAIL_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        queryset = DetectionResult.objects.exclude(image_key='')
+        if not options['force']:
+            queryset = queryset.filter(thumbnail_key='')
+
+        created = failed = 0
+        last_id = 0
+
+        while True:
+            batch = list(
+                queryset.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'result_id', 'image_key', 'thumbnail_key')[:batch_size]
+            )
+            if not batch:
+                break
+
+            for result in batch:
+                if result.make_thumbnail():
+                    created += 1
+                else:
+                    failed += 1
+
+            DetectionResult.objects.bulk_update(batch, ['thumbnail_key'])
+            last_id = batch[-1].id
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Миниатюр создано: {created}, ошибок: {failed}"
+        ))
@@ -0,0 +1,65 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recognition_images.retention import PurgeStats, purge_results_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет результаты распознавания старше срока хранения вместе с '
+        'компонентами, изображениями и миниатюрами (для запуска по cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.RESULT_RETENTION_DAYS,
+            help='Удалять результаты старше N дней'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.RESULT_PURGE_CHUNK_SIZE,
+            help='Сколько результатов удалять в одной транзакции'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза между пачками в секундах (снижает нагрузку на БД)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать, что будет удалено'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        dry_run = options['dry_run']
+        total = PurgeStats()
+        started = time.monotonic()
+
+        for chunk in purge_results_chunks(cutoff, options['chunk_size'], dry_run):
+            total.add(chunk)
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f"  пачка: результатов {chunk.results}, компонентов {chunk.components}, "
+                    f"файлов {chunk.files}"
+                )
+            if options['pause'] and not dry_run:
+                time.sleep(options['pause'])
+
+        elapsed = time.monotonic() - started
+        rate = total.results / elapsed if elapsed else 0
+        action = 'Будет удалено' if dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} результатов старше {cutoff:%d.%m.%Y}: {total.results}, "
+            f"компонентов: {total.components}, файлов: {total.files} "
+            f"({total.bytes / 1024 / 1024:.1f} МБ) за {elapsed:.1f} с, {rate:.0f} результатов/с"
+        ))
@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recognition_images import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Воркер очереди распознавания. Число одновременных запросов к серверу '
+        'нейросети = количество воркеров x --concurrency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить задачи, которые есть в очереди, и завершиться'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.DETECTION_WORKER_CONCURRENCY,
+            help='Сколько задач брать из очереди и выполнять параллельно'
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = settings.DETECTION_WORKER_POLL_INTERVAL
+        concurrency = max(1, options['concurrency'])
+        processed = 0
+
+        self.stdout.write(f'Воркер распознавания запущен (параллельно задач: {concurrency})')
+
+        try:
+            while True:
+                claimed = []
+                while len(claimed) < concurrency:
+                    job = jobs.claim_next_job()
+                    if job is None:
+                        break
+                    claimed.append(job)
+
+                if not claimed:
+                    jobs.fail_stale_jobs()
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                if len(claimed) == 1:
+                    jobs.run_detection_job(claimed[0])
+                else:
+                    jobs.run_detection_batch(claimed)
+
+                processed += len(claimed)
+                for job in claimed:
+                    self.stdout.write(f"Задача {job.job_id}: {job.status}")
+
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Воркер остановлен, выполнено задач: {processed}"))
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recognition_images.access import remember_results
+from recognition_images.models import DetectionResult
+
+
+class Command(BaseCommand):
+    help = 'Заполняет индекс доступа к результатам в кэше (после перезапуска или очистки кэша)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.HISTORY_DAYS,
+            help='Загрузить результаты за последние N дней'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько записей обрабатывать за один проход'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = DetectionResult.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=options['days'])
+        )
+
+        loaded = 0
+        last_id = 0
+
+        while True:
+            batch = list(
+                queryset.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'result_id', 'user_id', 'session_key', 'created_at')[:batch_size]
+            )
+            if not batch:
+                break
+
+            remember_results(batch)
+            loaded += len(batch)
+            last_id = batch[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f"Результатов в индексе доступа: {loaded}"))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recognition_images', '0003_detectionresult_edited_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detectionresult',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='detectionresult',
+            name='image_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=80),
+        ),
+        migrations.AddField(
+            model_name='detectionresult',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='detectionresult',
+            name='image_base64',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,174 @@
+import base64
+import hashlib
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import migrations
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Сколько записей обрабатываем за один проход, чтобы не тянуть
+# всю таблицу с тяжелыми base64 в память
+BATCH_SIZE = 100
+
+# Каталог (в BLOB_STORAGE_ROOT) для base64 записей, которые не удалось
+# разобрать: 0006 удаляет image_base64, а данные не должны пропасть
+UNMIGRATED_DIR = 'unmigrated'
+
+# Копия нужной части recognition_images.blob_storage на момент миграции:
+# дальнейшие правки модуля не должны менять уже примененную миграцию
+FORMAT_EXTENSIONS = {
+    'PNG': 'png',
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+    'GIF': 'gif',
+    'BMP': 'bmp',
+    'TIFF': 'tif',
+}
+
+MIME_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'webp': 'image/webp',
+    'gif': 'image/gif',
+    'bmp': 'image/bmp',
+    'tif': 'image/tiff',
+}
+
+
+def decode_base64_image(image_base64):
+    """Декодирует base64 строку (в том числе data URI) в байты"""
+    image_base64 = image_base64.strip()
+    if 'base64,' in image_base64:
+        image_base64 = image_base64.split('base64,', 1)[1]
+    return base64.b64decode(image_base64)
+
+
+def name_for_key(key):
+    return f"{key[:2]}/{key[2:4]}/{key}"
+
+
+def blob_storage():
+    return FileSystemStorage(location=settings.BLOB_STORAGE_ROOT)
+
+
+def save_blob(storage, data):
+    """Сохраняет байты изображения, возвращает (key, width, height)"""
+    with Image.open(BytesIO(data)) as image:
+        width, height = image.size
+        extension = FORMAT_EXTENSIONS.get(image.format, 'bin')
+
+    key = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+    name = name_for_key(key)
+    if not storage.exists(name):
+        saved_name = storage.save(name, ContentFile(data))
+        if saved_name != name:
+            storage.delete(saved_name)
+    return key, width, height
+
+
+def keep_unmigrated(storage, result):
+    """Сохраняет исходный base64 записи, которую не удалось перенести.
+
+    Если не получилось и это, миграция останавливается до удаления
+    колонки в 0006.
+    """
+    name = f"{UNMIGRATED_DIR}/result_{result.id}.b64"
+    try:
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(result.image_base64.encode('utf-8')))
+    except Exception as e:
+        raise RuntimeError(
+            f"Изображение результата {result.id} не перенесено и не сохранено в {name}: {e}"
+        ) from e
+    return name
+
+
+def move_images_to_blob_storage(apps, schema_editor):
+    DetectionResult = apps.get_model('recognition_images', 'DetectionResult')
+    storage = blob_storage()
+    last_id = 0
+    failed = []
+
+    while True:
+        batch = list(
+            DetectionResult.objects.filter(id__gt=last_id, image_key='')
+            .exclude(image_base64='')
+            .order_by('id')
+            .only('id', 'image_base64')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        for result in batch:
+            try:
+                image_data = decode_base64_image(result.image_base64)
+                result.image_key, result.image_width, result.image_height = save_blob(storage, image_data)
+            except Exception as e:
+                name = keep_unmigrated(storage, result)
+                failed.append(result.id)
+                logger.warning(
+                    f"Не удалось перенести изображение результата {result.id}: {e}; "
+                    f"исходные данные сохранены в {name}"
+                )
+
+        DetectionResult.objects.bulk_update(batch, ['image_key', 'image_width', 'image_height'])
+        last_id = batch[-1].id
+
+    if failed:
+        logger.warning(
+            f"Не перенесено изображений: {len(failed)} (id: {failed}), "
+            f"см. {settings.BLOB_STORAGE_ROOT}/{UNMIGRATED_DIR}"
+        )
+
+
+def blob_to_data_uri(storage, key):
+    extension = key.rsplit('.', 1)[-1]
+    mime_type = MIME_TYPES.get(extension, 'application/octet-stream')
+    with storage.open(name_for_key(key), 'rb') as f:
+        encoded = base64.b64encode(f.read()).decode('ascii')
+    return f"data:{mime_type};base64,{encoded}"
+
+
+def restore_images_from_blob_storage(apps, schema_editor):
+    DetectionResult = apps.get_model('recognition_images', 'DetectionResult')
+    storage = blob_storage()
+    last_id = 0
+
+    while True:
+        batch = list(
+            DetectionResult.objects.filter(id__gt=last_id)
+            .exclude(image_key='')
+            .order_by('id')
+            .only('id', 'image_key')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        for result in batch:
+            try:
+                result.image_base64 = blob_to_data_uri(storage, result.image_key)
+            except Exception as e:
+                logger.warning(f"Не удалось восстановить изображение результата {result.id}: {e}")
+
+        DetectionResult.objects.bulk_update(batch, ['image_base64'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    # Каждая пачка коммитится отдельно, без одной огромной транзакции
+    atomic = False
+
+    dependencies = [
+        ('recognition_images', '0004_detectionresult_image_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_images_to_blob_storage, restore_images_from_blob_storage),
+    ]
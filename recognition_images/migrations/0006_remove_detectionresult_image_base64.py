@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recognition_images', '0005_move_images_to_blob_storage'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='detectionresult',
+            name='image_base64',
+        ),
+    ]
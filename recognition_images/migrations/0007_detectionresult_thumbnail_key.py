@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recognition_images', '0006_remove_detectionresult_image_base64'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detectionresult',
+            name='thumbnail_key',
+            field=models.CharField(blank=True, default='', max_length=80),
+        ),
+    ]
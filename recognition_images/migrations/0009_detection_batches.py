@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recognition_images', '0008_detectionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detectionjob',
+            name='batch_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=36),
+        ),
+        migrations.AddField(
+            model_name='detectionjob',
+            name='page_number',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='detectionresult',
+            name='batch_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=36),
+        ),
+        migrations.AddField(
+            model_name='detectionresult',
+            name='page_number',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recognition_images', '0009_detection_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detectionjob',
+            name='source_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
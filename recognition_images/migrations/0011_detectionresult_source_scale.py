@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recognition_images', '0010_detectionjob_source_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detectionresult',
+            name='source_scale',
+            field=models.FloatField(default=1.0),
+        ),
+    ]
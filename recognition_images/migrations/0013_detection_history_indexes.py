@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recognition_images', '0012_detection_content_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='detectionresult',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='detect_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='detectionresult',
+            index=models.Index(fields=['user', 'is_favorite', '-created_at', '-id'], name='detect_user_fav_created_idx'),
+        ),
+    ]
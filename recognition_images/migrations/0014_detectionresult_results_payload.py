@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recognition_images', '0013_detection_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detectionresult',
+            name='results_payload',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,10 @@
+import logging
+
 from django.db import models
 from django.conf import settings
+from .blob_storage import blob_storage
+
+logger = logging.getLogger(__name__)
 
 class Component(models.Model):
     COMPONENT_TYPES = (
@@ -57,20 +62,67 @@ class Component(models.Model):
     
     @classmethod
     def cleanup_old_results(cls, hours=24):
+        """Удаляет компоненты старше hours часов вместе с их изображениями.
+
+        Удаление идет пачками по индексу comp_created_at_idx, без загрузки
+        всех строк в память. Возвращает число удаленных компонентов.
+        """
         from django.utils import timezone
         from datetime import timedelta
+        from .retention import purge_components
         
         cutoff_time = timezone.now() - timedelta(hours=hours)
-        old_components = cls.objects.filter(created_at__lt=cutoff_time)
-        count = old_components.count()
-        old_components.delete()
-        return count
+        return purge_components(cutoff_time).components
+
+class JSONArrayLength(models.Func):
+    """Длина JSON-массива, посчитанная в БД (не массив - 0).
+
+    Нужна, чтобы списки не загружали JSON-колонку целиком ради len().
+    """
+    output_field = models.IntegerField()
+    template = "CASE WHEN json_type(%(expressions)s) = 'array' THEN json_array_length(%(expressions)s) ELSE 0 END"
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template="CASE WHEN jsonb_typeof(%(expressions)s) = 'array' "
+                     "THEN jsonb_array_length(%(expressions)s) ELSE 0 END",
+            **extra_context
+        )
+
+
+class DetectionResultQuerySet(models.QuerySet):
+    # JSON-колонки распознавания, правок и поиска: могут занимать сотни КБ
+    # на строку и нужны только странице одного результата
+    HEAVY_FIELDS = ('detected_data', 'edited_data', 'search_results', 'results_payload')
+
+    def summary(self):
+        """Результаты для списков: без тяжелых JSON-колонок.
+
+        Обращение к отложенному полю у объекта из summary() - отдельный
+        запрос на каждую строку, поэтому в списках их читать нельзя.
+        """
+        return self.defer(*self.HEAVY_FIELDS)
+
+    def with_detected_count(self):
+        """Добавляет detected_count - число распознанных элементов"""
+        return self.annotate(detected_count=JSONArrayLength('detected_data'))
+
 
 class DetectionResult(models.Model):
     session_key = models.CharField(max_length=100)
     result_id = models.CharField(max_length=100, unique=True)
-    image_base64 = models.TextField()
+
+    # Само изображение лежит в blob_storage, в модели только ключ и размеры
+    image_key = models.CharField(max_length=80, blank=True, default='', db_index=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    thumbnail_key = models.CharField(max_length=80, blank=True, default='')
+
     search_results = models.JSONField(null=True, blank=True)
+    # Готовые данные страницы results (категории, JSON для скриптов,
+    # изображение). Пересобираются при сохранении компонентов результата
+    results_payload = models.JSONField(null=True, blank=True)
     detected_data = models.JSONField()
     edited_data = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -80,6 +132,18 @@ class DetectionResult(models.Model):
     name = models.CharField('Название', max_length=255, default='Без названия')
     is_favorite = models.BooleanField('Избранное', default=False)
 
+    # Результаты одной загрузки из нескольких листов (страниц PDF)
+    batch_id = models.CharField(max_length=36, blank=True, default='', db_index=True)
+    page_number = models.PositiveIntegerField(null=True, blank=True)
+
+    # Во сколько раз исходник уменьшен перед распознаванием:
+    # координаты рамок / source_scale = координаты в загруженном файле
+    source_scale = models.FloatField(default=1.0)
+
+    # SHA-256 загруженного файла: повторная загрузка того же файла
+    # берет detected_data отсюда, без обращения к нейросети
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -89,10 +153,100 @@ class DetectionResult(models.Model):
     )
     
     old_user_id = models.IntegerField(null=True, blank=True)
+
+    objects = DetectionResultQuerySet.as_manager()
     
     class Meta:
         indexes = [
             models.Index(fields=['session_key', 'result_id'], name='detect_session_result_idx'),
             models.Index(fields=['created_at'], name='detect_created_at_idx'),
+            models.Index(fields=['content_hash', 'created_at'], name='detect_hash_created_idx'),
+            # Keyset-пагинация истории: (user, -created_at, -id)
+            models.Index(fields=['user', '-created_at', '-id'], name='detect_user_created_idx'),
+            models.Index(fields=['user', 'is_favorite', '-created_at', '-id'], name='detect_user_fav_created_idx'),
         ]
-        db_table = 'recognition_images_detectionresult'
\ No newline at end of file
+        db_table = 'recognition_images_detectionresult'
+
+    @property
+    def image_url(self):
+        """URL изображения результата"""
+        if not self.image_key:
+            return ''
+        return blob_storage.url(self.image_key)
+
+    @property
+    def thumbnail_url(self):
+        """URL миниатюры для списков (если ее нет - полное изображение)"""
+        if self.thumbnail_key:
+            return blob_storage.url(self.thumbnail_key)
+        return self.image_url
+
+    def set_image(self, image_data):
+        """Сохраняет байты изображения в хранилище и запоминает ключ"""
+        self.image_key, self.image_width, self.image_height = blob_storage.save(image_data)
+        self.make_thumbnail()
+
+    def make_thumbnail(self):
+        """Создает миниатюру изображения. Ошибка не мешает сохранению результата"""
+        if not self.image_key:
+            return False
+        try:
+            self.thumbnail_key = blob_storage.save_thumbnail(self.image_key)
+            return True
+        except Exception as e:
+            logger.warning(f"Не удалось создать миниатюру для {self.result_id}: {e}")
+            return False
+
+
+class DetectionJob(models.Model):
+    """Задача распознавания в очереди (выполняется воркером run_detection_worker)"""
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUSES = (
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_PROCESSING, 'Обрабатывается'),
+        (STATUS_DONE, 'Готово'),
+        (STATUS_FAILED, 'Ошибка'),
+    )
+
+    job_id = models.CharField(max_length=36, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='detection_jobs'
+    )
+    session_key = models.CharField(max_length=40, db_index=True, default='')
+
+    status = models.CharField(max_length=20, choices=STATUSES, default=STATUS_PENDING)
+    file = models.FileField(upload_to='detection_jobs/', blank=True)
+    result_id = models.CharField(max_length=100, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+
+    # Задачи одной пакетной загрузки (например, страницы одного PDF)
+    batch_id = models.CharField(max_length=36, blank=True, default='', db_index=True)
+    page_number = models.PositiveIntegerField(null=True, blank=True)
+    source_name = models.CharField(max_length=255, blank=True, default='')
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+        db_table = 'recognition_images_detectionjob'
+
+    def __str__(self):
+        return f"{self.job_id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
@@ -0,0 +1,86 @@
+import base64
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Постоянные файлы, которые встраиваются в PDF коммерческого предложения:
+# имя переменной шаблона -> (путь относительно static/, обязательный ли файл)
+PDF_ASSETS = {
+    'FONT_BASE64': (os.path.join('font', 'manrope-regular.ttf'), True),
+    'LOGO_BASE64': (os.path.join('images', 'logo_for_contacts.png'), False),
+    'ENGINEER_BASE64': (os.path.join('images', 'kononuchenko_dmitriy.jpeg'), False),
+    'MANAGER_BASE64': (os.path.join('images', 'petrova_antonina.jpg'), False),
+}
+
+
+class MissingAssetError(Exception):
+    """Обязательный файл для PDF не найден"""
+
+
+class StaticAssetRegistry:
+    """Кэш файлов из static/ в виде base64 строк.
+
+    Файл читается и кодируется один раз на процесс. Время изменения
+    файлов проверяется не чаще, чем раз в PDF_ASSETS_CHECK_INTERVAL
+    секунд, и если файл поменялся, он перечитывается.
+    """
+
+    def __init__(self, assets, static_dir=None, check_interval=None):
+        self.assets = assets
+        self.static_dir = static_dir or os.path.join(settings.BASE_DIR, 'static')
+        self.check_interval = (
+            settings.PDF_ASSETS_CHECK_INTERVAL if check_interval is None else check_interval
+        )
+        self._entries = {}  # имя -> (mtime, base64 или None)
+        self._context = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def get_context(self):
+        """Словарь {имя переменной шаблона: base64} для рендеринга PDF"""
+        context = self._context
+        if context is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return context
+
+        with self._lock:
+            if self._context is None or time.monotonic() - self._checked_at >= self.check_interval:
+                self._context = self._load()
+                self._checked_at = time.monotonic()
+            return self._context
+
+    def _load(self):
+        context = {}
+        for name, (relative_path, required) in self.assets.items():
+            path = os.path.join(self.static_dir, relative_path)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                if required:
+                    raise MissingAssetError(f"Файл не найден: {path}")
+                self._entries.pop(name, None)
+                context[name] = None
+                continue
+
+            entry = self._entries.get(name)
+            if entry is None or entry[0] != mtime:
+                with open(path, 'rb') as f:
+                    entry = (mtime, base64.b64encode(f.read()).decode('utf-8'))
+                self._entries[name] = entry
+                logger.debug(f"Файл для PDF загружен в кэш: {path}")
+            context[name] = entry[1]
+        return context
+
+    def clear(self):
+        """Сбрасывает кэш (файлы перечитаются при следующем обращении)"""
+        with self._lock:
+            self._entries = {}
+            self._context = None
+            self._checked_at = 0
+
+
+pdf_assets = StaticAssetRegistry(PDF_ASSETS)
@@ -0,0 +1,36 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+# Алиас кэша из settings.CACHES для готовых PDF коммерческих предложений
+PDF_CACHE_ALIAS = 'pdf'
+
+
+def pdf_cache_key(data, backend_name=None):
+    """Хэш содержимого PDF: данные запроса, бэкенд, версия шаблона и дата.
+
+    JSON приводится к каноническому виду (сортировка ключей, без пробелов),
+    поэтому одинаковый набор товаров дает один и тот же ключ независимо
+    от порядка полей. Дата нужна, потому что она печатается в документе.
+    """
+    payload = {
+        'data': data,
+        'backend': backend_name or settings.PDF_BACKEND,
+        'template_version': settings.PDF_TEMPLATE_VERSION,
+        'date': timezone.localdate().isoformat(),
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def get_cached_pdf(key):
+    return caches[PDF_CACHE_ALIAS].get(f"offer_pdf:{key}")
+
+
+def store_pdf(key, pdf):
+    """Сохраняет PDF в кэш, если он не больше PDF_CACHE_MAX_SIZE байт"""
+    if len(pdf) <= settings.PDF_CACHE_MAX_SIZE:
+        caches[PDF_CACHE_ALIAS].set(f"offer_pdf:{key}", pdf)
@@ -0,0 +1,160 @@
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .pdf_cache import store_pdf
+from .pdf_render import render_offer_pdf
+
+logger = logging.getLogger(__name__)
+
+# Каталог в MEDIA_ROOT с готовыми PDF фоновых задач
+PDF_JOBS_DIR = 'offer_pdfs'
+
+STATUS_PENDING = 'pending'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+# Идентификатор задачи - это ключ pdf_cache_key (sha256)
+JOB_ID_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class PDFBusyError(Exception):
+    """Все слоты генерации PDF в процессе заняты"""
+
+
+# Ограничение одновременных генераций PDF в одном процессе (и для
+# синхронного, и для фонового режима), чтобы всплеск запросов PDF
+# не занял все потоки воркера и не мешал загрузке схем
+_render_slots = threading.BoundedSemaphore(settings.PDF_MAX_CONCURRENCY)
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = set()
+
+
+def render_pdf_limited(context, timeout=None):
+    """Рендерит PDF, дождавшись свободного слота (не дольше timeout секунд)"""
+    if not _render_slots.acquire(timeout=timeout):
+        raise PDFBusyError("Нет свободных слотов для генерации PDF")
+    try:
+        return render_offer_pdf(context)
+    finally:
+        _render_slots.release()
+
+
+def is_valid_job_id(job_id):
+    return bool(JOB_ID_RE.match(job_id or ''))
+
+
+def pdf_name(job_id):
+    return f"{PDF_JOBS_DIR}/{job_id}.pdf"
+
+
+def _error_name(job_id):
+    return f"{PDF_JOBS_DIR}/{job_id}.error"
+
+
+def _pending_name(job_id):
+    return f"{PDF_JOBS_DIR}/{job_id}.pending"
+
+
+def get_job_status(job_id):
+    """Статус задачи по файлам в хранилище, поэтому его видят все процессы.
+
+    Если процесс с задачей убит посреди генерации, ни PDF, ни .error не
+    появятся. Поэтому задача, чья метка .pending старше PDF_JOB_TIMEOUT,
+    считается упавшей.
+    """
+    if default_storage.exists(pdf_name(job_id)):
+        return STATUS_DONE
+    if default_storage.exists(_error_name(job_id)):
+        return STATUS_FAILED
+    started_at = _pending_started_at(job_id)
+    if started_at is not None and time.time() - started_at > settings.PDF_JOB_TIMEOUT:
+        return STATUS_FAILED
+    return STATUS_PENDING
+
+
+def _pending_started_at(job_id):
+    """Время запуска задачи из метки .pending (None, если метки нет)"""
+    try:
+        with default_storage.open(_pending_name(job_id), 'rb') as f:
+            return float(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def submit_pdf_job(job_id, context):
+    """Ставит генерацию PDF в фоновый поток, возвращает текущий статус.
+
+    Одинаковые данные дают один job_id, поэтому повторный запрос на тот же
+    документ не запускает генерацию второй раз.
+    """
+    status = get_job_status(job_id)
+    if status == STATUS_DONE:
+        return status
+    if status == STATUS_FAILED:
+        # Пользователь нажал еще раз - пробуем заново
+        default_storage.delete(_error_name(job_id))
+
+    with _executor_lock:
+        if job_id in _in_flight:
+            return STATUS_PENDING
+        # Метка с временем запуска: по ней видно зависшую задачу
+        default_storage.delete(_pending_name(job_id))
+        _save_file(_pending_name(job_id), str(time.time()).encode('ascii'))
+        _in_flight.add(job_id)
+        _get_executor().submit(_run_pdf_job, job_id, context)
+    return STATUS_PENDING
+
+
+def _run_pdf_job(job_id, context):
+    try:
+        pdf = render_pdf_limited(context)
+        store_pdf(job_id, pdf)
+        _save_file(pdf_name(job_id), pdf)
+        logger.info(f"PDF {job_id} создан в фоне")
+    except Exception as e:
+        logger.exception(f"Ошибка фоновой генерации PDF {job_id}")
+        _save_file(_error_name(job_id), str(e).encode('utf-8'))
+    finally:
+        default_storage.delete(_pending_name(job_id))
+        with _executor_lock:
+            _in_flight.discard(job_id)
+
+
+def _save_file(name, data):
+    if default_storage.exists(name):
+        return
+    saved_name = default_storage.save(name, ContentFile(data))
+    # Тот же документ мог параллельно создать другой процесс
+    if saved_name != name:
+        default_storage.delete(saved_name)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PDF_MAX_CONCURRENCY,
+            thread_name_prefix='pdf-job'
+        )
+    return _executor
+
+
+def _reset_after_fork():
+    """Потоки родителя в дочернем процессе не существуют - начинаем заново"""
+    global _executor, _executor_lock, _render_slots, _in_flight
+    _executor = None
+    _executor_lock = threading.Lock()
+    _render_slots = threading.BoundedSemaphore(settings.PDF_MAX_CONCURRENCY)
+    _in_flight = set()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
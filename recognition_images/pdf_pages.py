@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+
+class PDFPagesError(Exception):
+    """Ошибка разбора PDF или номеров страниц"""
+
+
+def parse_page_range(spec, page_count):
+    """Номера страниц из строки вида "1-3,5" (нумерация с 1).
+
+    Пустая строка - все страницы. Повторы убираются, порядок сохраняется.
+    """
+    if not spec or not spec.strip():
+        return list(range(1, page_count + 1))
+
+    pages = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                first, last = (int(value) for value in part.split('-', 1))
+            else:
+                first = last = int(part)
+        except ValueError:
+            raise PDFPagesError(f"Неверный номер страницы: {part}")
+
+        if first < 1 or last > page_count or first > last:
+            raise PDFPagesError(f"Страницы {part} нет в документе (всего {page_count})")
+        pages.extend(range(first, last + 1))
+
+    return list(dict.fromkeys(pages))
+
+
+def get_page_count(pdf_path):
+    from pdf2image import pdfinfo_from_path
+
+    try:
+        return int(pdfinfo_from_path(pdf_path)['Pages'])
+    except Exception as e:
+        raise PDFPagesError(f"Не удалось прочитать PDF: {e}")
+
+
+def _render_page(pdf_path, page_number, dpi, output_folder):
+    """Растеризует одну страницу в PNG (выполняется в отдельном процессе)"""
+    from pdf2image import convert_from_path
+
+    paths = convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=page_number,
+        last_page=page_number,
+        fmt='png',
+        output_folder=output_folder,
+        output_file=f"page_{page_number:04d}",
+        single_file=True,
+        paths_only=True,
+    )
+    return paths[0]
+
+
+def rasterize_pages(pdf_path, pages, output_folder, dpi=None):
+    """Растеризует страницы PDF параллельно, возвращает пути к PNG по порядку.
+
+    pdftoppm и перекодирование занимают CPU, поэтому страницы рендерятся
+    в пуле процессов (PDF_RASTER_PROCESSES), а не в потоках запроса.
+    """
+    dpi = dpi or settings.PDF_RASTER_DPI
+    executor = _get_executor()
+    futures = [
+        executor.submit(_render_page, pdf_path, page_number, dpi, output_folder)
+        for page_number in pages
+    ]
+    try:
+        return [future.result() for future in futures]
+    except BrokenProcessPool as e:
+        # Процесс пула упал - сломанный пул больше не примет задачи
+        _reset_after_fork()
+        raise PDFPagesError(f"Ошибка растеризации PDF: {e}")
+    except Exception as e:
+        raise PDFPagesError(f"Ошибка растеризации PDF: {e}")
+
+
+# Пул процессов общий для процесса веб-сервера и создается при первом PDF.
+# spawn, а не fork: форк многопоточного воркера может унаследовать
+# захваченные блокировки
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.PDF_RASTER_PROCESSES,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _executor
+
+
+def _reset_after_fork():
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
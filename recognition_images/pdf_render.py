@@ -0,0 +1,122 @@
+import logging
+import os
+import shutil
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+
+class PDFRenderError(Exception):
+    """Ошибка генерации PDF"""
+
+
+class WkhtmltopdfBackend:
+    """PDF через внешнюю программу wkhtmltopdf (pdfkit).
+
+    На каждый документ запускается отдельный процесс с WebKit, поэтому
+    это самый медленный вариант, зато верстка шаблона полностью как в браузере.
+    """
+
+    name = 'wkhtmltopdf'
+    template_name = 'recognition/pdf_template.html'
+    options = {
+        'encoding': 'UTF-8',
+        'quiet': '',
+        'enable-local-file-access': None,
+        'no-stop-slow-scripts': '',
+        'load-error-handling': 'ignore',
+        'margin-top': '15mm',
+        'margin-bottom': '15mm',
+        'margin-left': '10mm',
+        'margin-right': '10mm',
+        'dpi': 300,
+        'image-quality': 100,
+    }
+
+    def __init__(self):
+        import pdfkit
+
+        self.pdfkit = pdfkit
+        # Путь задается в settings.WKHTMLTOPDF_PATH, иначе ищем программу в PATH
+        path = settings.WKHTMLTOPDF_PATH or shutil.which('wkhtmltopdf')
+        if not path:
+            raise PDFRenderError("Не найдена программа wkhtmltopdf (settings.WKHTMLTOPDF_PATH)")
+        self.configuration = pdfkit.configuration(wkhtmltopdf=path)
+
+    def render(self, html):
+        return self.pdfkit.from_string(
+            html,
+            False,
+            options=self.options,
+            configuration=self.configuration
+        )
+
+
+class Xhtml2pdfBackend:
+    """PDF внутри процесса через xhtml2pdf (reportlab), без запуска программ.
+
+    xhtml2pdf не поддерживает flexbox и position: fixed, поэтому у него
+    свой шаблон с той же версткой на таблицах и @page frame для футера.
+    """
+
+    name = 'xhtml2pdf'
+    template_name = 'recognition/pdf_template_xhtml2pdf.html'
+
+    # Имя шрифта в CSS шаблона
+    font_name = 'Manrope'
+
+    def __init__(self):
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        from xhtml2pdf import default, pisa
+
+        from .pdf_assets import PDF_ASSETS, pdf_assets
+
+        self.pisa = pisa
+        # @font-face с data URI xhtml2pdf не понимает, поэтому шрифт с
+        # кириллицей регистрируем в reportlab один раз на процесс
+        font_path = os.path.join(pdf_assets.static_dir, PDF_ASSETS['FONT_BASE64'][0])
+        pdfmetrics.registerFont(TTFont(self.font_name, font_path))
+        default.DEFAULT_FONT[self.font_name.lower()] = self.font_name
+
+    def render(self, html):
+        buffer = BytesIO()
+        result = self.pisa.CreatePDF(html, dest=buffer, encoding='utf-8')
+        if result.err:
+            raise PDFRenderError(f"xhtml2pdf: ошибок при генерации - {result.err}")
+        return buffer.getvalue()
+
+
+PDF_BACKENDS = {
+    WkhtmltopdfBackend.name: WkhtmltopdfBackend,
+    Xhtml2pdfBackend.name: Xhtml2pdfBackend,
+}
+
+# Бэкенды создаются один раз на процесс (импорт библиотек, поиск wkhtmltopdf)
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_pdf_backend(name=None):
+    """Возвращает бэкенд по имени, по умолчанию - settings.PDF_BACKEND"""
+    name = name or settings.PDF_BACKEND
+    backend = _backends.get(name)
+    if backend is None:
+        if name not in PDF_BACKENDS:
+            raise PDFRenderError(f"Неизвестный PDF_BACKEND: {name}")
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = _backends[name] = PDF_BACKENDS[name]()
+    return backend
+
+
+def render_offer_pdf(context, backend_name=None):
+    """Рендерит коммерческое предложение в PDF, возвращает байты"""
+    backend = get_pdf_backend(backend_name)
+    html = render_to_string(backend.template_name, context)
+    return backend.render(html)
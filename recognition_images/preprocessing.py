@@ -0,0 +1,65 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Тег EXIF с ориентацией снимка (1 - без поворота)
+EXIF_ORIENTATION = 0x0112
+
+
+def prepare_for_detection(fileobj):
+    """Готовит изображение к отправке в нейросеть.
+
+    Поворачивает снимок по EXIF и уменьшает так, чтобы длинная сторона
+    была не больше DETECTION_MAX_EDGE. Возвращает (файл, scale), где
+    scale - во сколько раз уменьшено изображение: координаты рамок из
+    detection_results / scale = координаты в исходном файле.
+
+    Если ничего менять не нужно, отправляется исходный файл без
+    перекодирования.
+    """
+    max_edge = settings.DETECTION_MAX_EDGE
+    fileobj.seek(0)
+
+    with Image.open(fileobj) as image:
+        orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+        longest = max(image.size)
+        if orientation == 1 and longest <= max_edge:
+            fileobj.seek(0)
+            return fileobj, 1.0
+
+        source_format = image.format
+        # thumbnail с reducing_gap для JPEG декодирует сразу в уменьшенном
+        # масштабе (draft), поэтому 12+ Мп снимок не разворачивается целиком
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=3.0)
+        image = ImageOps.exif_transpose(image)
+        scale = max(image.size) / longest
+
+        buffer = BytesIO()
+        if source_format == 'JPEG':
+            extension = 'jpg'
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.save(buffer, format='JPEG', quality=settings.DETECTION_JPEG_QUALITY)
+        else:
+            # Чертежи в PNG: без потерь, иначе страдают тонкие линии
+            extension = 'png'
+            image.save(buffer, format='PNG')
+
+    base_name = os.path.splitext(os.path.basename(getattr(fileobj, 'name', None) or 'upload'))[0]
+    return ContentFile(buffer.getvalue(), name=f"{base_name}.{extension}"), scale
+
+
+def prepare_or_original(fileobj):
+    """prepare_for_detection, а если файл не открывается Pillow - исходный файл"""
+    try:
+        return prepare_for_detection(fileobj)
+    except Exception as e:
+        logger.warning(f"Изображение отправлено без подготовки: {e}")
+        fileobj.seek(0)
+        return fileobj, 1.0
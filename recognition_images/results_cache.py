@@ -0,0 +1,83 @@
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import quote_etag
+
+from . import results_payload
+
+RESULTS_CACHE_ALIAS = 'results'
+
+
+def owner_key(request):
+    """Владелец страницы в ключе кэша: пользователь или гостевая сессия"""
+    if request.user.is_authenticated:
+        return f"u{request.user.pk}"
+    return f"s{request.session.session_key}"
+
+
+def page_validators(result_id, edited_at):
+    """(ETag, Last-Modified) страницы результата по времени его изменения.
+
+    RESULTS_PAYLOAD_VERSION в ETag: после смены формата данных или
+    шаблона браузеры не получат 304 на старую страницу.
+    """
+    etag = quote_etag(f"{result_id}-{int(edited_at.timestamp() * 1000000)}-{results_payload.RESULTS_PAYLOAD_VERSION}")
+    return etag, int(edited_at.timestamp())
+
+
+def _version_key(result_id):
+    return f"results_page_version:{result_id}"
+
+
+def _page_key(result_id, owner):
+    return f"results_page:{result_id}:{owner}"
+
+
+def get_cached_page(result_id, owner):
+    """(готовая страница результата для владельца или None, версия результата).
+
+    Страница действительна, пока жива версия результата: сброс версии
+    (invalidate_results_page) разом устаревает страницы всех владельцев.
+    Версия и страница читаются одним запросом к кэшу. Версию при промахе
+    нужно передать в store_page, а ETag страницы вызывающий сверяет с
+    edited_at из БД: страница, собранная по еще не зафиксированной
+    старой строке, не совпадет ни по версии, ни по ETag.
+    """
+    cache = caches[RESULTS_CACHE_ALIAS]
+    version_key = _version_key(result_id)
+    page_key = _page_key(result_id, owner)
+    cached = cache.get_many([version_key, page_key])
+    version = cached.get(version_key)
+    page = cached.get(page_key)
+    if version is not None and page is not None and page['version'] == version:
+        return page, version
+
+    if version is None:
+        # add не перезапишет версию, которую уже выдал параллельный запрос
+        cache.add(version_key, uuid.uuid4().hex)
+        version = cache.get(version_key)
+    return None, version
+
+
+def store_page(result_id, owner, version, content, etag, last_modified):
+    if version is None:
+        return
+    caches[RESULTS_CACHE_ALIAS].set(_page_key(result_id, owner), {
+        'version': version,
+        'content': content,
+        'etag': etag,
+        'last_modified': last_modified,
+    })
+
+
+def invalidate_results_page(result_id):
+    """Сбрасывает кэш страницы результата (после изменения результата или компонентов).
+
+    Сброс выполняется после фиксации транзакции: до нее параллельный
+    запрос еще читает старую строку и заново закэшировал бы ее.
+    """
+    if result_id:
+        transaction.on_commit(
+            lambda: caches[RESULTS_CACHE_ALIAS].delete(_version_key(result_id))
+        )
@@ -0,0 +1,163 @@
+import json
+from collections import defaultdict
+
+from django.utils import timezone
+
+from . import models, results_cache
+from .categories import CategoryManager, ItemTable
+from .utils import get_category_name
+
+# Версия формата; при изменении подготовки данных старые payload
+# пересобираются из Component при первом показе
+RESULTS_PAYLOAD_VERSION = 2
+
+
+def build_results_payload(components):
+    """Данные страницы results по компонентам результата.
+
+    Возвращает словарь с категориями для шаблона, общей таблицей
+    кандидатов, JSON исходных данных для скриптов страницы и именем файла
+    изображения, либо None, если компонентов нет.
+    """
+    if not components:
+        return None
+
+    # Тот же порядок, что order_by('component_type', 'group_index', 'id');
+    # sorted устойчив, а компоненты идут в порядке создания
+    components = sorted(components, key=lambda comp: (
+        comp.component_type, comp.group_index is None, comp.group_index or 0
+    ))
+
+    cleaned_data = {
+        'automatic': [],
+        'transformer': [],
+        'counter': []
+    }
+    seen_transformers = set()
+    seen_counters = set()
+    categories_data = {}
+
+    for comp in components:
+        item = {
+            'id': str(comp.article).strip(),
+            'name': str(comp.name).strip(),
+            'price': float(comp.price),
+            'quantity': int(comp.quantity)
+        }
+
+        if comp.component_type == 'automatic':
+            cleaned_data['automatic'].append(item)
+        elif comp.component_type == 'transformer':
+            if comp.article not in seen_transformers:
+                seen_transformers.add(comp.article)
+                cleaned_data['transformer'].append(item)
+        elif comp.component_type == 'counter':
+            if comp.article not in seen_counters:
+                seen_counters.add(comp.article)
+                cleaned_data['counter'].append(item)
+
+        if comp.component_type not in categories_data:
+            categories_data[comp.component_type] = {
+                'name': get_category_name(comp.component_type),
+                'groups': defaultdict(list),
+                'is_grouped': comp.component_type == 'automatic',
+            }
+
+        categories_data[comp.component_type]['groups'][comp.group_index].append({
+            'id': comp.article,
+            'name': comp.name,
+            'price': float(comp.price),
+            'group_index': comp.group_index,
+            'quantity': comp.quantity
+        })
+
+    item_table = ItemTable()
+    final_categories = []
+
+    for component_type, category in categories_data.items():
+        category_groups = []
+
+        for group_idx, items in category['groups'].items():
+            if category['is_grouped']:
+                manager = CategoryManager(f"Автоматический выключатель {group_idx + 1}", item_table)
+                manager.add_item_group(items)
+                prepared_group = manager.prepare_for_template()
+                prepared_group['total_quantity'] = sum(item.get('quantity', 1) for item in items)
+            else:
+                first_item_quantity = items[0].get('quantity', 1)
+
+                if component_type == 'transformer':
+                    title = f"Трансформатор (x{first_item_quantity})"
+                elif component_type == 'counter':
+                    title = f"Счетчик (x{first_item_quantity})"
+                else:
+                    title = f"{category['name']} {group_idx + 1}"
+
+                manager = CategoryManager(title, item_table)
+                manager.add_item_group(items)
+                prepared_group = manager.prepare_for_template()
+                prepared_group['actual_quantity'] = first_item_quantity
+                prepared_group['group_count'] = len(category['groups'])
+            category_groups.append(prepared_group)
+
+        final_categories.append({
+            'name': category['name'],
+            'is_grouped': category['is_grouped'],
+            'groups': category_groups
+        })
+
+    return {
+        'version': RESULTS_PAYLOAD_VERSION,
+        'categories': final_categories,
+        'items': item_table.items,
+        'original_data_json': json.dumps(
+            cleaned_data,
+            ensure_ascii=False,
+            indent=None,
+            separators=(',', ':')
+        ),
+        # Изображение результата записано в первый созданный компонент
+        'image_name': next((comp.image.name for comp in components if comp.image), ''),
+    }
+
+
+def save_results_payload(result_id, components, touch=True):
+    """Пересобирает и сохраняет payload результата (вызывается при смене компонентов).
+
+    touch обновляет edited_at, от которого считаются ETag и Last-Modified
+    страницы results; пересборка того же содержимого в новом формате
+    (get_results_payload) его не трогает.
+    """
+    payload = build_results_payload(components)
+    fields = {'results_payload': payload}
+    if touch:
+        fields['edited_at'] = timezone.now()
+    # update() не шлет post_save, поэтому кэш страницы сбрасывается здесь
+    models.DetectionResult.objects.filter(result_id=result_id).update(**fields)
+    results_cache.invalidate_results_page(result_id)
+    return payload
+
+
+def get_results_payload(detection_result, owner_filter):
+    """payload результата; устаревший или отсутствующий собирается из Component.
+
+    Сборка нужна только результатам, сохраненным до появления payload
+    или до смены RESULTS_PAYLOAD_VERSION, и выполняется один раз.
+    """
+    payload = detection_result.results_payload
+    if payload and payload.get('version') == RESULTS_PAYLOAD_VERSION:
+        return payload
+
+    components = list(models.Component.objects.filter(
+        result_id=detection_result.result_id, **owner_filter
+    ).order_by('component_type', 'group_index', 'id'))
+    if not components:
+        return None
+    return save_results_payload(detection_result.result_id, components, touch=False)
+
+
+def image_url(payload):
+    """URL изображения результата из payload"""
+    if not payload.get('image_name'):
+        return ''
+    return models.Component._meta.get_field('image').storage.url(payload['image_name'])
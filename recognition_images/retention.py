@@ -0,0 +1,138 @@
+from django.db import transaction
+from django.db.models import Q
+
+from . import models
+from .blob_storage import blob_storage
+
+
+class PurgeStats:
+    """Счетчики удаления: записи, файлы и освобожденное место"""
+
+    def __init__(self):
+        self.results = 0
+        self.components = 0
+        self.files = 0
+        self.bytes = 0
+
+    def add(self, other):
+        self.results += other.results
+        self.components += other.components
+        self.files += other.files
+        self.bytes += other.bytes
+
+
+def _delete_files(storage, names, dry_run, stats):
+    for name in names:
+        try:
+            size = storage.size(name)
+            if not dry_run:
+                storage.delete(name)
+        except OSError:
+            # Файл уже удален вручную или другим запуском
+            continue
+        stats.files += 1
+        stats.bytes += size
+
+
+def _delete_component_images(image_names, dry_run, stats):
+    """Файлы media/detection_results (один файл на result_id, не общий)"""
+    storage = models.Component._meta.get_field('image').storage
+    _delete_files(storage, [name for name in image_names if name], dry_run, stats)
+
+
+def _delete_orphan_blobs(results, dry_run, stats):
+    """Изображения и миниатюры удаленных результатов, на которые никто не ссылается.
+
+    Хранилище content-addressed: тот же image_key может быть у другого
+    результата (повторная загрузка файла), такие файлы остаются. Миниатюра
+    считается от содержимого изображения, поэтому удаляется вместе с ним.
+    """
+    keys = {result.image_key for result in results if result.image_key}
+    if not keys:
+        return
+
+    referencing = models.DetectionResult.objects.filter(image_key__in=keys)
+    # В dry-run удаляемые строки еще в БД, их ссылки не считаются
+    # (у уже удаленных объектов pk = None, NOT IN (NULL) отбросил бы все)
+    pks = [result.pk for result in results if result.pk is not None]
+    if pks:
+        referencing = referencing.exclude(pk__in=pks)
+    still_used = set(referencing.values_list('image_key', flat=True))
+    names = []
+    for result in results:
+        if result.image_key and result.image_key not in still_used:
+            names.append(blob_storage.name_for_key(result.image_key))
+            if result.thumbnail_key:
+                names.append(blob_storage.name_for_key(result.thumbnail_key))
+            # Дубликаты ключа в одной пачке удаляются один раз
+            still_used.add(result.image_key)
+    _delete_files(blob_storage.storage, names, dry_run, stats)
+
+
+def delete_unused_blobs(results):
+    """Удаляет файлы удаленных результатов, на которые больше никто не ссылается"""
+    stats = PurgeStats()
+    _delete_orphan_blobs(results, False, stats)
+    return stats
+
+
+def purge_results_chunks(cutoff, chunk_size=500, dry_run=False):
+    """Удаляет результаты, созданные до cutoff, пачками по chunk_size.
+
+    Генератор: после каждой пачки отдает ее PurgeStats, поэтому вызывающий
+    может печатать прогресс и делать паузы между пачками. Пачка выбирается
+    по индексу detect_created_at_idx, ее результаты и компоненты удаляются
+    в одной короткой транзакции, файлы - после ее фиксации.
+    """
+    last = None
+    while True:
+        queryset = models.DetectionResult.objects.filter(created_at__lt=cutoff)
+        if dry_run and last:
+            # Без удаления следующая пачка начинается после последней строки
+            queryset = queryset.filter(
+                Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, id__gt=last.pk)
+            )
+        results = list(
+            queryset.order_by('created_at', 'id')
+            .only('id', 'result_id', 'user_id', 'created_at', 'image_key', 'thumbnail_key')[:chunk_size]
+        )
+        if not results:
+            return
+        last = results[-1]
+
+        stats = PurgeStats()
+        stats.results = len(results)
+        result_ids = [result.result_id for result in results]
+        components = models.Component.objects.filter(result_id__in=result_ids)
+        image_names = list(components.exclude(image='').values_list('image', flat=True))
+
+        if dry_run:
+            stats.components = components.count()
+        else:
+            with transaction.atomic():
+                stats.components, _ = components.delete()
+                # only(): сигналам удаления (сброс кэшей) не нужны JSON-колонки
+                models.DetectionResult.objects.filter(
+                    pk__in=[result.pk for result in results]
+                ).only('id', 'result_id', 'user_id').delete()
+
+        _delete_component_images(image_names, dry_run, stats)
+        _delete_orphan_blobs(results, dry_run, stats)
+        yield stats
+
+
+def purge_components(cutoff, chunk_size=500):
+    """Удаляет компоненты, созданные до cutoff, и их изображения пачками"""
+    stats = PurgeStats()
+    while True:
+        chunk = list(
+            models.Component.objects.filter(created_at__lt=cutoff)
+            .order_by('created_at')
+            .values_list('id', 'image')[:chunk_size]
+        )
+        if not chunk:
+            return stats
+
+        deleted, _ = models.Component.objects.filter(pk__in=[pk for pk, _ in chunk]).delete()
+        stats.components += deleted
+        _delete_component_images([image for _, image in chunk], False, stats)
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import access, history, models, results_cache
+
+
+@receiver(post_save, sender=models.DetectionResult)
+def detection_result_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Счетчики истории меняются только при новом результате, смене
+    # владельца или избранного; правки разметки их не трогают
+    if created or update_fields is None or {'user', 'is_favorite'} & set(update_fields):
+        history.invalidate_result_count(instance.user_id)
+    # Индекс доступа хранит владельца: обновляется при создании и его смене
+    if created or update_fields is None or {'user', 'session_key'} & set(update_fields):
+        access.remember_results([instance])
+    results_cache.invalidate_results_page(instance.result_id)
+
+
+@receiver(post_delete, sender=models.DetectionResult)
+def detection_result_deleted(sender, instance, **kwargs):
+    history.invalidate_result_count(instance.user_id)
+    access.forget_results(instance.result_id)
+    results_cache.invalidate_results_page(instance.result_id)
+
+
+# Только post_save: обработчик post_delete отключил бы быстрое удаление
+# компонентов одним DELETE. Массовые удаления и вставки (сохранение
+# результатов поиска) сбрасывают кэш через save_results_payload
+@receiver(post_save, sender=models.Component)
+def component_saved(sender, instance, **kwargs):
+    results_cache.invalidate_results_page(instance.result_id)
@@ -1,3 +1,104 @@
-from django.test import TestCase
+import re
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.activity import session_activity
+
+from . import views
+from .models import DetectionResult, DetectionResultQuerySet
+
+# detected_count в админке считается в БД: колонка встречается в SQL только
+# как аргумент json-функций, сам JSON не передается
+JSON_FUNCTION_RE = re.compile(r'(?:jsonb?_type|jsonb?_typeof|jsonb?_array_length)\([^)]*\)')
+
+
+class DetectionResultListQueriesTests(TestCase):
+    """Списки результатов не читают тяжелые JSON-колонки DetectionResult"""
+
+    def setUp(self):
+        self._clear_caches()
+        self.user = get_user_model().objects.create_superuser(
+            'owner', 'owner@example.com', 'password'
+        )
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        # Таймер буфера активности не должен писать в БД после теста
+        session_activity.stop()
+
+    @staticmethod
+    def _clear_caches():
+        # Счетчики и страницы лежат в общих кэшах, а bulk_create их не сбрасывает
+        for cache in caches.all():
+            cache.clear()
+
+    def _create_results(self, count):
+        heavy = [{'class': 'QF', 'box': [0, 0, 10, 10]}] * 50
+        DetectionResult.objects.bulk_create([
+            DetectionResult(
+                user=self.user,
+                session_key='session',
+                result_id=f'result-{DetectionResult.objects.count()}-{index}',
+                detected_data=heavy,
+                edited_data=heavy,
+                search_results={'items': heavy},
+                results_payload={'version': 0, 'categories': heavy},
+            )
+            for index in range(count)
+        ])
+
+    def _result_queries(self, request):
+        """SQL запросов к DetectionResult, выполненных в request()"""
+        self._clear_caches()
+        with CaptureQueriesContext(connection) as context:
+            request()
+        table = DetectionResult._meta.db_table
+        return [query['sql'] for query in context.captured_queries if table in query['sql']]
+
+    def assertNoHeavyColumns(self, queries):
+        self.assertTrue(queries)
+        for sql in queries:
+            sql = JSON_FUNCTION_RE.sub('', sql)
+            for field in DetectionResultQuerySet.HEAVY_FIELDS:
+                self.assertNotIn(field, sql)
+
+    def assertListQueries(self, request):
+        """Нет тяжелых колонок, число запросов не растет с числом строк"""
+        self._create_results(3)
+        few = self._result_queries(request)
+        self.assertNoHeavyColumns(few)
+
+        self._create_results(30)
+        many = self._result_queries(request)
+        self.assertNoHeavyColumns(many)
+        self.assertEqual(len(few), len(many))
+
+    def test_dashboard(self):
+        self.assertListQueries(
+            lambda: self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        )
+
+    def test_my_results_list(self):
+        # Шаблона у представления нет (маршрут отключен), поэтому проверяем
+        # запросы, которые выполнит контекст
+        def request():
+            http_request = RequestFactory().get('/')
+            http_request.user = self.user
+            with mock.patch.object(views, 'render', return_value=HttpResponse()) as render:
+                views.my_results_list(http_request)
+            list(render.call_args.args[2]['results'])
+
+        self.assertListQueries(request)
+
+    def test_admin_changelist(self):
+        url = reverse('admin:recognition_images_detectionresult_changelist')
+        self.assertListQueries(
+            lambda: self.assertEqual(self.client.get(url).status_code, 200)
+        )
@@ -9,7 +9,13 @@ urlpatterns = [
     path('search-db/', views.process_edited_data, name='process_edited_data'),  # AJAX запрос для поиска
     path('results/', views.results_view, name='results'),  # GET запрос для отображения результатов
     path('create-pdf/', views.create_pdf, name='create_pdf'),
+    path('create-pdf/jobs/<str:job_id>/status/', views.pdf_job_status, name='pdf_job_status'),
+    path('create-pdf/jobs/<str:job_id>/download/', views.download_pdf, name='pdf_job_download'),
     path('process-pdf/', views.process_pdf, name='process_pdf'),
+    path('process-pdf-document/', views.process_pdf_document, name='process_pdf_document'),
+    path('upload-batch/', views.upload_batch, name='upload_batch'),
+    path('jobs/<str:job_id>/status/', views.detection_job_status, name='detection_job_status'),
+    path('batches/<str:batch_id>/status/', views.detection_batch_status, name='detection_batch_status'),
     path('api/check-results-access/', views.api_check_results_access, name='api_check_results_access'),
 
     path('result/<str:result_id>/', views.view_result_by_id, name='view_result'),
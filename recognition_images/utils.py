@@ -1,45 +1,30 @@
 import os
-from datetime import datetime
-import tempfile
-from django.utils import timezone
-from datetime import timedelta
-from django.core.cache import cache
-from . import models  # импорт моделей
+from datetime import datetime, timedelta
+from . import access
 
+# Результат доступен по ссылке из сессии, пока он не старше часа
+RESULT_MAX_AGE = timedelta(hours=1)
 
-def validate_result(session_key, result_id):
+
+def validate_result(session_key, result_id, user=None):
     """
-    Проверяет, является ли результат валидным (существует и не устарел)
+    Проверяет, принадлежит ли результат пользователю или сессии и не устарел ли он
     
     Args:
         session_key (str): Ключ сессии пользователя
         result_id (str): ID результата для проверки
+        user: Пользователь (для результатов, сохраненных в аккаунт)
     
     Returns:
-        bool: True если результат валиден, False если устарел или не существует
+        bool: True если результат существует, доступен и не старше
+            RESULT_MAX_AGE, False если нет
     """
-    if not result_id or not session_key:
+    if not result_id or not (session_key or user):
         return False
     
-    # Проверяем кэш для производительности (необязательно, но рекомендуется)
-    cache_key = f"result_valid_{session_key}_{result_id}"
-    cached_result = cache.get(cache_key)
-    if cached_result is not None:
-        return cached_result
-    
-    # Проверяем в базе данных - результат должен быть не старше 1 часа
-    one_hour_ago = timezone.now() - timedelta(hours=1)
-    
-    is_valid = models.Component.objects.filter(
-        result_id=result_id,
-        session_key=session_key,
-        created_at__gte=one_hour_ago  # created_at >= one_hour_ago
-    ).exists()
-    
-    # Кэшируем результат на 5 минут для уменьшения нагрузки на БД
-    cache.set(cache_key, is_valid, 300)  # 300 секунд = 5 минут
-    
-    return is_valid
+    # Владелец и время создания берутся из индекса доступа в кэше: один
+    # запрос к кэшу, БД читается только при промахе
+    return access.can_access(result_id, user, session_key, max_age=RESULT_MAX_AGE)
 
 def check_results_access(request):
     """
@@ -51,27 +36,12 @@ def check_results_access(request):
     Returns:
         bool: True если есть доступ к результатам, False если нет
     """
-    result_id = request.session.get('last_result_id')
-    has_access = False
-    
-    if result_id and request.session.session_key:
-        has_access = validate_result(request.session.session_key, result_id)
-    
-    return has_access
-
-    
-#перенести  
-def handle_uploaded_file(file):
-    """Сохраняет временный файл и возвращает путь"""
-    temp_dir = tempfile.gettempdir()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_path = os.path.join(temp_dir, f"upload_{timestamp}_{file.name}")
-    
-    with open(temp_path, 'wb+') as destination:
-        for chunk in file.chunks():
-            destination.write(chunk)
+    return validate_result(
+        request.session.session_key,
+        request.session.get('last_result_id'),
+        request.user
+    )
     
-    return temp_path
 
 def save_result_image(image_bytes):
     """Сохраняет обработанное изображение"""
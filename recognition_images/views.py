@@ -1,31 +1,41 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from . import forms, api_client, models
-from .utils import handle_uploaded_file, get_component_type, get_category_name, validate_result
+from . import forms, api_client, models, jobs, pdf_pages, batch_upload, history, results_payload, results_cache, access, retention
+from .utils import get_component_type
 import tempfile, os, json, base64
 from datetime import datetime
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
 from io import BytesIO
 from PIL import Image
-from .categories import CategoryManager
-from collections import defaultdict
 from django.http import HttpResponse
 import json
 import logging
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, quote_etag
 from django.template.loader import render_to_string
 from django.conf import settings
-import pdfkit
 from django.utils.safestring import mark_safe
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import reverse
+import re
 import uuid
-from .db_client import DBClient
-from collections import defaultdict
+from django.db import transaction
+from .db_client import get_db_client
+from .blob_storage import blob_storage
+from .pdf_assets import pdf_assets, MissingAssetError
+from . import pdf_jobs
+from .pdf_cache import pdf_cache_key, get_cached_pdf, store_pdf
 
 logger = logging.getLogger(__name__)
 
+PRICE_CLEANUP_RE = re.compile(r'[^\d.,]')
+
+# Форматы изображений, которые можно отдавать браузеру без перекодирования
+WEB_IMAGE_EXTENSIONS = ('png', 'jpg', 'webp', 'gif')
+
 def view_result_by_id(request, result_id):
     """Просмотр конкретного результата по ID"""
     try:
@@ -61,207 +71,6 @@ def view_result_by_id(request, result_id):
         messages.error(request, 'Результат не найден')
         return redirect('dashboard')
 
-def results_view(request):
-    """Передает данные на страницу results"""
-    try:
-        # Получаем ID результата из GET параметра или из сессии
-        result_id = request.GET.get('result_id') or request.session.get('last_result_id')
-        
-        if not result_id:
-            messages.error(request, 'Результат не найден')
-            return redirect('upload')
-        
-        # Сохраняем ID в сессии для дальнейшего использования
-        request.session['last_result_id'] = result_id
-        request.session.modified = True
-        
-        # Получаем ключ сессии
-        session_key = request.session.session_key
-        
-        # Поиск компонентов - сначала по пользователю, потом по сессии
-        if request.user.is_authenticated:
-            # Для авторизованных пользователей ищем по user
-            component_with_image = models.Component.objects.filter(
-                result_id=result_id,
-                user=request.user
-            ).exclude(image__isnull=True).first()
-            
-            # Если не нашли, пробуем найти в сессии и перенести
-            if not component_with_image:
-                temp_component = models.Component.objects.filter(
-                    result_id=result_id,
-                    session_key=session_key
-                ).exclude(image__isnull=True).first()
-                
-                if temp_component:
-                    # Переносим все компоненты в аккаунт
-                    models.Component.objects.filter(
-                        result_id=result_id,
-                        session_key=session_key
-                    ).update(user=request.user)
-                    
-                    # Переносим результат
-                    models.DetectionResult.objects.filter(
-                        result_id=result_id,
-                        session_key=session_key
-                    ).update(user=request.user)
-                    
-                    # Обновляем ссылку
-                    component_with_image = models.Component.objects.filter(
-                        result_id=result_id,
-                        user=request.user
-                    ).exclude(image__isnull=True).first()
-        else:
-            # Для гостей ищем по сессии
-            component_with_image = models.Component.objects.filter(
-                result_id=result_id,
-                session_key=session_key
-            ).exclude(image__isnull=True).first()
-            
-            # Проверяем, не истекла ли сессия
-            if not component_with_image:
-                # Проверяем, есть ли результат в базе, но сессия истекла
-                old_result = models.DetectionResult.objects.filter(
-                    result_id=result_id
-                ).first()
-                
-                if old_result:
-                    messages.warning(
-                        request, 
-                        'Сессия истекла. Войдите в аккаунт, чтобы восстановить доступ к результатам.'
-                    )
-                    return redirect('login')
-        
-        if not component_with_image:
-            messages.warning(request, 'Результаты не найдены')
-            return redirect('upload')
-        
-        # Получаем все компоненты
-        filter_kwargs = {'result_id': result_id}
-        if request.user.is_authenticated:
-            filter_kwargs['user'] = request.user
-        else:
-            filter_kwargs['session_key'] = session_key
-        
-        all_components = models.Component.objects.filter(
-            **filter_kwargs
-        ).order_by('component_type', 'group_index', 'id')
-        
-        components = list(all_components)
-        
-        # Подготовка данных (весь ваш существующий код подготовки данных)
-        cleaned_data = {
-            'automatic': [],
-            'transformer': [],
-            'counter': []
-        }
-        
-        seen_transformers = set()
-        seen_counters = set()
-        
-        for comp in components:
-            item = {
-                'id': str(comp.article).strip(),
-                'name': str(comp.name).strip(),
-                'price': float(comp.price),
-                'quantity': int(comp.quantity)
-            }
-            
-            if comp.component_type == 'automatic':
-                cleaned_data['automatic'].append(item)
-            elif comp.component_type == 'transformer':
-                if comp.article not in seen_transformers:
-                    seen_transformers.add(comp.article)
-                    cleaned_data['transformer'].append(item)
-            elif comp.component_type == 'counter':
-                if comp.article not in seen_counters:
-                    seen_counters.add(comp.article)
-                    cleaned_data['counter'].append(item)
-        
-        # Подготовка данных для categories
-        categories_data = {}
-        
-        for comp in components:
-            if comp.component_type not in categories_data:
-                categories_data[comp.component_type] = {
-                    'name': get_category_name(comp.component_type),
-                    'groups': defaultdict(list),
-                    'is_grouped': comp.component_type == 'automatic',
-                }
-            
-            item_data = {
-                'id': comp.article,
-                'name': comp.name,
-                'price': float(comp.price),
-                'group_index': comp.group_index,
-                'quantity': comp.quantity
-            }
-            
-            categories_data[comp.component_type]['groups'][comp.group_index].append(item_data)
-        
-        final_categories = []
-        
-        for component_type, category in categories_data.items():
-            category_groups = []
-            
-            if category['is_grouped']:
-                for group_idx, items in sorted(category['groups'].items()):
-                    total_quantity = sum(item.get('quantity', 1) for item in items)
-                    manager = CategoryManager(f"Автоматический выключатель {group_idx + 1}")
-                    manager.add_item_group(items)
-                    prepared_group = manager.prepare_for_template()
-                    prepared_group['total_quantity'] = total_quantity
-                    category_groups.append(prepared_group)
-            else:
-                if category['groups']:
-                    for group_idx, items in sorted(category['groups'].items()):
-                        if items:
-                            first_item_quantity = items[0].get('quantity', 1)
-                            
-                            if component_type == 'transformer':
-                                title = f"Трансформатор (x{first_item_quantity})"
-                            elif component_type == 'counter':
-                                title = f"Счетчик (x{first_item_quantity})"
-                            else:
-                                title = f"{category['name']} {group_idx + 1}"
-                            
-                            manager = CategoryManager(title)
-                            manager.add_item_group(items)
-                            prepared_group = manager.prepare_for_template()
-                            prepared_group['actual_quantity'] = first_item_quantity
-                            prepared_group['group_count'] = len(category['groups'])
-                            category_groups.append(prepared_group)
-            
-            final_categories.append({
-                'name': category['name'],
-                'is_grouped': category['is_grouped'],
-                'groups': category_groups
-            })
-        
-        # Сериализация данных
-        original_data_json = mark_safe(json.dumps(
-            cleaned_data,
-            ensure_ascii=False,
-            indent=None,
-            separators=(',', ':')
-        ))
-        
-        context = {
-            'categories': final_categories,
-            'result_image_url': component_with_image.image.url,
-            'original_data_json': original_data_json,
-            'result_id': result_id,
-            'user': request.user
-        }
-        
-        return render(request, 'recognition/results.html', context)
-    
-    except Exception as e:
-        logger.error(f"Ошибка в results_view: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return render(request, 'recognition/results.html', {'error': str(e)})
-
 def get_or_create_session_key(request):
     """Получить или создать ключ сессии"""
     if not request.session.session_key:
@@ -280,10 +89,14 @@ def transfer_session_to_user(request, user):
     session_key = request.session.session_key
     if session_key:
         # Переносим DetectionResult
-        models.DetectionResult.objects.filter(
+        guest_results = models.DetectionResult.objects.filter(
             session_key=session_key,
             user__isnull=True
-        ).update(user=user)
+        )
+        result_ids = list(guest_results.values_list('result_id', flat=True))
+        guest_results.update(user=user)
+        history.invalidate_result_count(user.pk)
+        access.forget_results(*result_ids)
         
         # Переносим Component
         models.Component.objects.filter(
@@ -323,56 +136,35 @@ def upload_file(request):
         form = forms.UploadFileForm(request.POST, request.FILES)
         if form.is_valid():
             try:
-                file = request.FILES['file']
-                temp_path = handle_uploaded_file(file)
-                
-                # 1. Распознавание через нейросеть
-                api = api_client.APIClient()
-                api_response = api.detect_only(temp_path)
-                
-                # 2. Генерация уникального ID
-                result_id = str(uuid.uuid4())
-                
-                # 3. Получаем или создаем ключ сессии
+                # 1. Получаем или создаем ключ сессии
                 session_key = get_or_create_session_key(request)
                 
-                # 4. Сохраняем данные
-                detected_data = api_response['detection_results']
-                image_base64 = api_response['image_base64']
-                
-                # Нормализуем изображение перед сохранением
-                if isinstance(image_base64, str):
-                    image_base64 = image_base64.strip()
-                    if not image_base64.startswith('data:image'):
-                        image_base64 = f"data:image/jpeg;base64,{image_base64}"
-                else:
-                    try:
-                        image_base64 = str(image_base64)
-                        image_base64 = f"data:image/jpeg;base64,{image_base64}"
-                    except:
-                        image_base64 = ""
-                
-                # Создаем результат с учетом авторизации
-                detection_result = models.DetectionResult(
+                # 2. Ставим файл в очередь на распознавание
+                uploaded_file = request.FILES['file']
+                job = jobs.create_detection_job(
                     user=request.user if request.user.is_authenticated else None,
                     session_key=session_key,
-                    result_id=result_id,
-                    image_base64=image_base64,
-                    detected_data=detected_data,
-                    is_edited=False,
-                    name=f"Результат от {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+                    uploaded_file=uploaded_file,
+                    store_file=settings.DETECTION_ASYNC,
+                    content_hash=jobs.file_content_hash(uploaded_file),
+                    force_refresh=form.cleaned_data['force_refresh']
                 )
-                detection_result.save()
                 
-                # 5. Сохраняем ID в сессии
-                request.session['edit_result_id'] = result_id
-                request.session.modified = True
+                # 3. Без воркера распознаем прямо в запросе. Если файл уже
+                # загружался, задача завершена сразу копией прошлого результата
+                if not job.is_finished and not settings.DETECTION_ASYNC:
+                    jobs.run_detection_job(job, uploaded_file=uploaded_file)
+                if job.is_finished:
+                    payload = _detection_job_payload(request, job)
+                    if job.status == models.DetectionJob.STATUS_FAILED:
+                        raise Exception(payload['error'])
+                    return redirect('edit_results')
                 
-                # Сообщение для авторизованных пользователей
-                if request.user.is_authenticated:
-                    messages.success(request, 'Результат сохранен в ваш аккаунт')
-                
-                return redirect('edit_results')
+                # 4. Страница загрузки сама опрашивает статус задачи
+                return render(request, 'recognition/upload.html', {
+                    'form': forms.UploadFileForm(),
+                    'job_status_url': reverse('detection_job_status', args=[job.job_id])
+                })
                     
             except Exception as e:
                 logger.error(f"Ошибка обработки: {str(e)}")
@@ -386,6 +178,45 @@ def upload_file(request):
     return render(request, 'recognition/upload.html', {'form': forms.UploadFileForm()})
 
 
+def _detection_job_payload(request, job):
+    """Состояние задачи распознавания для ответа клиенту"""
+    payload = {
+        'job_id': job.job_id,
+        'status': job.status,
+    }
+    
+    if job.status == models.DetectionJob.STATUS_DONE:
+        # Результат готов - дальше работаем с ним как раньше
+        if request.session.get('edit_result_id') != job.result_id:
+            request.session['edit_result_id'] = job.result_id
+            request.session.modified = True
+            
+            if request.user.is_authenticated:
+                messages.success(request, 'Результат сохранен в ваш аккаунт')
+        
+        payload['redirect_url'] = reverse('edit_results')
+    elif job.status == models.DetectionJob.STATUS_FAILED:
+        payload['error'] = job.error or 'Ошибка распознавания'
+    
+    return payload
+
+
+def detection_job_status(request, job_id):
+    """AJAX статус задачи распознавания (опрашивается страницей загрузки)"""
+    filter_kwargs = {'job_id': job_id}
+    if request.user.is_authenticated:
+        filter_kwargs['user'] = request.user
+    else:
+        filter_kwargs['session_key'] = get_or_create_session_key(request)
+    
+    try:
+        job = models.DetectionJob.objects.get(**filter_kwargs)
+    except models.DetectionJob.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Задача не найдена'}, status=404)
+    
+    return JsonResponse(_detection_job_payload(request, job))
+
+
 def edit_results_view(request):
     """Промежуточная страница редактирования"""
     result_id = request.session.get('edit_result_id')
@@ -457,21 +288,9 @@ def edit_results_view(request):
                                 'parameters': {'quantity': quantity}
                             })
         
-        # Обработка изображения
-        image_base64 = detection_result.image_base64
-        image_base64 = image_base64.strip()
-        
-        if not image_base64.startswith('data:image'):
-            if 'base64,' in image_base64:
-                parts = image_base64.split('base64,')
-                if len(parts) > 1:
-                    image_base64 = f"data:image/jpeg;base64,{parts[1]}"
-            else:
-                image_base64 = f"data:image/jpeg;base64,{image_base64}"
-        
         context = {
             'result_id': result_id,
-            'image_base64': image_base64,
+            'image_url': detection_result.image_url,
             'detected_data': json.dumps(detected_data, ensure_ascii=False),
             'element_types': {
                 'QF': 'Автоматический выключатель',
@@ -554,7 +373,7 @@ def process_edited_data(request):
                 }, status=404)
             
             # Инициализация клиента БД
-            db_client = DBClient()
+            db_client = get_db_client()
             
             # Массив для хранения всех результатов поиска
             all_search_results = []
@@ -565,11 +384,25 @@ def process_edited_data(request):
             transformer_elements = [e for e in edited_elements if e.get('type') == 'transformer']
             counter_elements = [e for e in edited_elements if e.get('type') == 'counter']
             
+            # Все запросы к каталогу отправляем параллельно, порядок результатов сохраняется
+            queries = [('QF', e.get('parameters', {})) for e in qf_elements]
+            if transformer_elements:
+                queries.append(('transformer', transformer_elements[0].get('parameters', {})))
+            if counter_elements:
+                queries.append(('counter', counter_elements[0].get('parameters', {})))
+            
+            search_responses = db_client.search_batch(queries)
+            qf_responses = search_responses[:len(qf_elements)]
+            other_responses = iter(search_responses[len(qf_elements):])
+            transformer_response = next(other_responses) if transformer_elements else None
+            counter_response = next(other_responses) if counter_elements else None
+            
             # 1. Обработка автоматических выключателей
             for qf_idx, qf_element in enumerate(qf_elements):
                 try:
-                    params = qf_element.get('parameters', {})
-                    results = db_client.search_breakers(params)
+                    results = qf_responses[qf_idx]
+                    if isinstance(results, Exception):
+                        raise results
                     
                     all_search_results.append({
                         'type': 'QF',
@@ -608,9 +441,9 @@ def process_edited_data(request):
                         total_quantity += quantity
                     
                     if transformer_elements:
-                        first_element = transformer_elements[0]
-                        first_params = first_element.get('parameters', {})
-                        results = db_client.search_transformators(first_params)
+                        results = transformer_response
+                        if isinstance(results, Exception):
+                            raise results
                         
                         processed_results = []
                         if results:
@@ -660,9 +493,9 @@ def process_edited_data(request):
                         total_quantity += quantity
                     
                     if counter_elements:
-                        first_element = counter_elements[0]
-                        first_params = first_element.get('parameters', {})
-                        results = db_client.search_counters(first_params)
+                        results = counter_response
+                        if isinstance(results, Exception):
+                            raise results
                         
                         processed_results = []
                         if results:
@@ -708,7 +541,7 @@ def process_edited_data(request):
                 user=request.user if request.user.is_authenticated else None,
                 result_id=result_id,
                 search_results=all_search_results,
-                image_base64=detection_result.image_base64
+                image_key=detection_result.image_key
             )
             
             # Сохраняем ID для страницы results
@@ -743,113 +576,141 @@ def process_edited_data(request):
     return JsonResponse({'success': False, 'error': 'Метод не поддерживается'}, status=405)
 
 
-def _save_search_results_to_components(session_key, user, result_id, search_results, image_base64):
-    """Сохраняет результаты поиска в модель Component с сохранением группировки"""
+def _save_search_results_to_components(session_key, user, result_id, search_results, image_key):
+    """Сохраняет результаты поиска в модель Component с сохранением группировки.
+
+    Все компоненты создаются одним bulk_create в одной транзакции,
+    изображение результата записывается в первый компонент до вставки.
+    """
     try:
-        # Удаляем старые компоненты
         filter_kwargs = {'result_id': result_id}
         if user:
             filter_kwargs['user'] = user
         else:
             filter_kwargs['session_key'] = session_key
         
-        models.Component.objects.filter(**filter_kwargs).delete()
+        # Подготавливаем все компоненты до обращения к БД
+        components = _build_components(session_key, user, result_id, search_results)
         
-        component_count = 0
+        if components and image_key:
+            image_name = _save_result_image_file(result_id, image_key)
+            if image_name:
+                components[0].image = image_name
         
-        # Проходим по каждой группе результатов
-        for result_group in search_results:
-            element_type = result_group.get('type', 'QF')
-            search_results_list = result_group.get('search_results', [])
-            group_index = result_group.get('group_index', 0)
-            total_quantity = result_group.get('total_quantity', 1)
-            
-            # Преобразуем тип в формат Component
-            component_type = _map_element_type_to_component_type(element_type)
-            
-            for idx, search_result in enumerate(search_results_list):
-                try:
-                    article = search_result.get('article', '') or search_result.get('id', '')
-                    name = search_result.get('name', '') or search_result.get('description', '')
-                    
-                    # Обработка цены
-                    price = search_result.get('price', 0)
-                    try:
-                        if isinstance(price, str):
-                            import re
-                            price_str = re.sub(r'[^\d.,]', '', price)
-                            price_str = price_str.replace(',', '.')
-                            price = float(price_str) if price_str else 0.0
-                        else:
-                            price = float(price)
-                    except:
-                        price = 0.0
-                    
-                    # Определяем количество и итоговую цену
-                    if element_type in ['transformer', 'counter']:
-                        quantity = total_quantity
-                        if 'total_price' in search_result:
-                            try:
-                                price = float(search_result['total_price'])
-                            except:
-                                price = price * quantity
-                        else:
-                            price = price * quantity
-                    else:
-                        quantity = search_result.get('quantity', 1)
-                        if isinstance(quantity, str):
-                            try:
-                                quantity = int(quantity)
-                            except:
-                                quantity = 1
-                    
-                    component = models.Component(
-                        user=user,
-                        component_type=component_type,
-                        article=article or f'RES_{element_type}_{group_index}_{idx}',
-                        name=name or 'Неизвестно',
-                        price=price,
-                        object_id=f"{group_index+1}_{idx+1}",
-                        group_index=group_index,
-                        session_key=session_key,
-                        result_id=result_id,
-                        quantity=quantity
-                    )
-                    
-                    # Сохраняем изображение для первого компонента
-                    if component_count == 0 and image_base64:
-                        try:
-                            if isinstance(image_base64, str) and 'base64,' in image_base64:
-                                image_base64 = image_base64.split('base64,')[1]
-                            
-                            image_data = base64.b64decode(image_base64)
-                            image = Image.open(BytesIO(image_data))
-                            image_io = BytesIO()
-                            image.save(image_io, format='PNG')
-                            
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            image_name = f"result_{result_id}_{timestamp}.png"
-                            image_content = ContentFile(image_io.getvalue(), name=image_name)
-                            
-                            component.image.save(image_name, image_content)
-                        except Exception as img_error:
-                            logger.warning(f"Не удалось сохранить изображение: {img_error}")
-                    
-                    component.save()
-                    component_count += 1
-                    
-                except Exception as e:
-                    logger.error(f"Ошибка сохранения компонента: {e}")
-                    continue
+        with transaction.atomic():
+            # Удаляем старые компоненты
+            models.Component.objects.filter(**filter_kwargs).delete()
+            models.Component.objects.bulk_create(components)
+            # Данные страницы results собираются один раз, здесь
+            results_payload.save_results_payload(result_id, components)
         
-        logger.info(f"Сохранено {component_count} компонентов для result_id: {result_id}")
-        return component_count > 0
+        logger.info(f"Сохранено {len(components)} компонентов для result_id: {result_id}")
+        return len(components) > 0
         
     except Exception as e:
         logger.error(f"Ошибка сохранения результатов поиска: {e}")
         return False
 
 
+def _build_components(session_key, user, result_id, search_results):
+    """Собирает несохраненные объекты Component из результатов поиска"""
+    components = []
+    
+    # Проходим по каждой группе результатов
+    for result_group in search_results:
+        element_type = result_group.get('type', 'QF')
+        search_results_list = result_group.get('search_results', [])
+        group_index = result_group.get('group_index', 0)
+        total_quantity = result_group.get('total_quantity', 1)
+        
+        # Преобразуем тип в формат Component
+        component_type = _map_element_type_to_component_type(element_type)
+        
+        for idx, search_result in enumerate(search_results_list):
+            try:
+                article = search_result.get('article', '') or search_result.get('id', '')
+                name = search_result.get('name', '') or search_result.get('description', '')
+                price = _parse_price(search_result.get('price', 0))
+                
+                # Определяем количество и итоговую цену
+                if element_type in ['transformer', 'counter']:
+                    quantity = total_quantity
+                    if 'total_price' in search_result:
+                        try:
+                            price = float(search_result['total_price'])
+                        except:
+                            price = price * quantity
+                    else:
+                        price = price * quantity
+                else:
+                    quantity = search_result.get('quantity', 1)
+                    if isinstance(quantity, str):
+                        try:
+                            quantity = int(quantity)
+                        except:
+                            quantity = 1
+                
+                components.append(models.Component(
+                    user=user,
+                    component_type=component_type,
+                    article=article or f'RES_{element_type}_{group_index}_{idx}',
+                    name=name or 'Неизвестно',
+                    price=price,
+                    object_id=f"{group_index+1}_{idx+1}",
+                    group_index=group_index,
+                    session_key=session_key,
+                    result_id=result_id,
+                    quantity=quantity
+                ))
+                
+            except Exception as e:
+                logger.error(f"Ошибка подготовки компонента: {e}")
+                continue
+    
+    return components
+
+
+def _parse_price(price):
+    """Приводит цену из ответа каталога к float ("1 234,50 руб." -> 1234.5)"""
+    try:
+        if isinstance(price, str):
+            price_str = PRICE_CLEANUP_RE.sub('', price)
+            price_str = price_str.replace(',', '.')
+            return float(price_str) if price_str else 0.0
+        return float(price)
+    except:
+        return 0.0
+
+
+def _save_result_image_file(result_id, image_key):
+    """Возвращает имя файла изображения результата для компонентов.
+
+    Файл пишется один раз на result_id и переиспользуется при повторных
+    поисках. Байты копируются как есть, в PNG перекодируются только
+    форматы, которые браузеры не показывают.
+    """
+    try:
+        source_extension = image_key.rsplit('.', 1)[-1]
+        needs_png = source_extension not in WEB_IMAGE_EXTENSIONS
+        extension = 'png' if needs_png else source_extension
+        
+        field = models.Component._meta.get_field('image')
+        image_name = field.generate_filename(None, f"result_{result_id}.{extension}")
+        if field.storage.exists(image_name):
+            return image_name
+        
+        image_data = blob_storage.read(image_key)
+        if needs_png:
+            image_io = BytesIO()
+            Image.open(BytesIO(image_data)).save(image_io, format='PNG')
+            image_data = image_io.getvalue()
+        
+        return field.storage.save(image_name, ContentFile(image_data))
+    except Exception as img_error:
+        logger.warning(f"Не удалось сохранить изображение: {img_error}")
+        return None
+
+
 def _map_element_type_to_component_type(element_type):
     """Сопоставляет тип элемента с типом компонента"""
     type_mapping = {
@@ -880,7 +741,7 @@ def show_search_results(request):
         
         context = {
             'result_id': result_id,
-            'image_base64': detection_result.image_base64,
+            'image_url': detection_result.image_url,
             'edited_elements': detection_result.edited_data or [],
             'search_results': detection_result.search_results or [],
             'total_elements': len(detection_result.edited_data or []),
@@ -901,8 +762,32 @@ def show_search_results(request):
         return render(request, 'recognition/error.html', {'error': str(e)})
 
 
+def _results_page_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Страница личная: браузер хранит копию, но сверяет ее при каждом показе
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _results_page_response(request, content, etag, last_modified):
+    """Ответ страницы results: 304, если копия браузера актуальна"""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(content)
+    return _results_page_headers(response, etag, last_modified)
+
+
 def results_view(request):
-    """Передает данные на страницу results"""
+    """Передает данные на страницу results.
+
+    Данные страницы собраны заранее при сохранении компонентов
+    (results_payload), а готовый HTML кэшируется для владельца до
+    изменения результата. Каждый показ читает из БД только edited_at
+    (заодно проверяя владельца): от него считаются ETag и Last-Modified,
+    браузер с актуальной копией получает 304 без тела, а HTML из кэша
+    отдается, только если собран для того же edited_at.
+    """
     try:
         result_id = request.session.get('last_result_id')
         
@@ -910,137 +795,45 @@ def results_view(request):
             messages.error(request, 'Сессия истекла')
             return redirect('upload')
         
-        # Получаем ключ сессии
-        session_key = get_or_create_session_key(request)
-        
-        # Поиск компонентов
-        filter_kwargs = {'result_id': result_id}
-        if request.user.is_authenticated:
-            filter_kwargs['user'] = request.user
-        else:
-            filter_kwargs['session_key'] = session_key
-        
-        component_with_image = models.Component.objects.filter(
-            **filter_kwargs
-        ).exclude(image__isnull=True).first()
-        
-        if not component_with_image:
-            messages.warning(request, 'Результаты не найдены')
-            return redirect('upload')
-        
-        # Получаем все компоненты
-        all_components = models.Component.objects.filter(
-            **filter_kwargs
-        ).order_by('component_type', 'group_index', 'id')
-        
-        components = list(all_components)
-        
-        # Подготовка данных
-        cleaned_data = {
-            'automatic': [],
-            'transformer': [],
-            'counter': []
-        }
-        
-        seen_transformers = set()
-        seen_counters = set()
-        
-        for comp in components:
-            item = {
-                'id': str(comp.article).strip(),
-                'name': str(comp.name).strip(),
-                'price': float(comp.price),
-                'quantity': int(comp.quantity)
-            }
-            
-            if comp.component_type == 'automatic':
-                cleaned_data['automatic'].append(item)
-            elif comp.component_type == 'transformer':
-                if comp.article not in seen_transformers:
-                    seen_transformers.add(comp.article)
-                    cleaned_data['transformer'].append(item)
-            elif comp.component_type == 'counter':
-                if comp.article not in seen_counters:
-                    seen_counters.add(comp.article)
-                    cleaned_data['counter'].append(item)
-        
-        # Подготовка данных для categories
-        categories_data = {}
-        
-        for comp in components:
-            if comp.component_type not in categories_data:
-                categories_data[comp.component_type] = {
-                    'name': get_category_name(comp.component_type),
-                    'groups': defaultdict(list),
-                    'is_grouped': comp.component_type == 'automatic',
-                }
+        # Версия кэша читается до БД: страница, собранная параллельно
+        # с изменением результата, сохранится под уже сброшенной версией
+        owner = results_cache.owner_key(request)
+        page, version = results_cache.get_cached_page(result_id, owner)
+        
+        owner_filter = get_user_or_session_filter(request)
+        detection_result = models.DetectionResult.objects.only(
+            'id', 'result_id', 'edited_at'
+        ).filter(result_id=result_id, **owner_filter).first()
+        
+        payload = None
+        if detection_result:
+            etag, last_modified = results_cache.page_validators(result_id, detection_result.edited_at)
+            if page and page['etag'] == etag:
+                return _results_page_response(request, page['content'], etag, last_modified)
             
-            item_data = {
-                'id': comp.article,
-                'name': comp.name,
-                'price': float(comp.price),
-                'group_index': comp.group_index,
-                'quantity': comp.quantity
-            }
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return _results_page_headers(not_modified, etag, last_modified)
             
-            categories_data[comp.component_type]['groups'][comp.group_index].append(item_data)
+            # results_payload отложен: читается только при промахе кэша
+            payload = results_payload.get_results_payload(detection_result, owner_filter)
         
-        final_categories = []
-        
-        for component_type, category in categories_data.items():
-            category_groups = []
-            
-            if category['is_grouped']:
-                for group_idx, items in sorted(category['groups'].items()):
-                    total_quantity = sum(item.get('quantity', 1) for item in items)
-                    manager = CategoryManager(f"Автоматический выключатель {group_idx + 1}")
-                    manager.add_item_group(items)
-                    prepared_group = manager.prepare_for_template()
-                    prepared_group['total_quantity'] = total_quantity
-                    category_groups.append(prepared_group)
-            else:
-                if category['groups']:
-                    for group_idx, items in sorted(category['groups'].items()):
-                        if items:
-                            first_item_quantity = items[0].get('quantity', 1)
-                            
-                            if component_type == 'transformer':
-                                title = f"Трансформатор (x{first_item_quantity})"
-                            elif component_type == 'counter':
-                                title = f"Счетчик (x{first_item_quantity})"
-                            else:
-                                title = f"{category['name']} {group_idx + 1}"
-                            
-                            manager = CategoryManager(title)
-                            manager.add_item_group(items)
-                            prepared_group = manager.prepare_for_template()
-                            prepared_group['actual_quantity'] = first_item_quantity
-                            prepared_group['group_count'] = len(category['groups'])
-                            category_groups.append(prepared_group)
-            
-            final_categories.append({
-                'name': category['name'],
-                'is_grouped': category['is_grouped'],
-                'groups': category_groups
-            })
-        
-        # Сериализация данных
-        original_data_json = mark_safe(json.dumps(
-            cleaned_data,
-            ensure_ascii=False,
-            indent=None,
-            separators=(',', ':')
-        ))
+        if not payload:
+            messages.warning(request, 'Результаты не найдены')
+            return redirect('upload')
         
         context = {
-            'categories': final_categories,
-            'result_image_url': component_with_image.image.url,
-            'original_data_json': original_data_json,
+            'categories': payload['categories'],
+            'items': payload['items'],
+            'result_image_url': results_payload.image_url(payload),
+            'original_data_json': mark_safe(payload['original_data_json']),
             'result_id': result_id,
             'user': request.user
         }
         
-        return render(request, 'recognition/results.html', context)
+        content = render_to_string('recognition/results.html', context, request=request)
+        results_cache.store_page(result_id, owner, version, content, etag, last_modified)
+        return _results_page_response(request, content, etag, last_modified)
     
     except Exception as e:
         logger.error(f"Ошибка в results_view: {str(e)}")
@@ -1063,7 +856,7 @@ def save_result_to_account(request, result_id):
 @login_required
 def my_results_list(request):
     """Список всех результатов пользователя"""
-    results = models.DetectionResult.objects.filter(
+    results = models.DetectionResult.objects.summary().filter(
         user=request.user
     ).order_by('-created_at')
     
@@ -1117,6 +910,9 @@ def delete_result(request, result_id):
             result_id=result_id
         ).delete()
         result.delete()
+        # Изображение и миниатюра в blob_storage могут быть общими с другим
+        # результатом (повторная загрузка) - удаляются только ничьи
+        retention.delete_unused_blobs([result])
         messages.success(request, 'Результат успешно удален')
     except models.DetectionResult.DoesNotExist:
         messages.error(request, 'Результат не найден')
@@ -1127,18 +923,12 @@ def delete_result(request, result_id):
 @csrf_exempt
 def api_check_results_access(request):
     """API для проверки доступа к результатам"""
-    has_access = False
-    
-    if request.user.is_authenticated:
-        has_access = True
-    elif request.session.session_key:
-        # Проверяем, есть ли результаты в сессии
-        result_id = request.session.get('last_result_id')
-        if result_id:
-            has_access = models.DetectionResult.objects.filter(
-                session_key=request.session.session_key,
-                result_id=result_id
-            ).exists()
+    # Только принадлежность результата, без срока давности validate_result
+    has_access = access.can_access(
+        request.session.get('last_result_id'),
+        request.user,
+        request.session.session_key
+    )
     
     return JsonResponse({
         'has_access': has_access,
@@ -1162,41 +952,35 @@ def process_pdf(request):
             logger.error("No image provided")
             return JsonResponse({'error': 'No image provided'}, status=400)
         
-        temp_path = handle_uploaded_file(request.FILES['image'])
-        logger.info(f"File saved to: {temp_path}")
-        
-        api = api_client.APIClient()
-        api_response = api.detect_only(temp_path)
-        logger.info("API response received")
-        
-        result_id = str(uuid.uuid4())
-        
-        # Сохраняем результат
-        detection_result = models.DetectionResult(
+        uploaded_file = request.FILES['image']
+        job = jobs.create_detection_job(
             user=request.user if request.user.is_authenticated else None,
             session_key=session_key,
-            result_id=result_id,
-            image_base64=api_response['image_base64'],
-            detected_data=api_response['detection_results'],
-            is_edited=False,
-            name=f"Результат от {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+            uploaded_file=uploaded_file,
+            store_file=settings.DETECTION_ASYNC,
+            content_hash=jobs.file_content_hash(uploaded_file),
+            force_refresh=request.POST.get('force_refresh') in ('1', 'true', 'on')
         )
-        detection_result.save()
-        
-        request.session['edit_result_id'] = result_id
-        request.session.modified = True
-        
-        # Удаление временного файла
-        try:
-            os.unlink(temp_path)
-            logger.info("Temporary file deleted")
-        except Exception as e:
-            logger.warning(f"Could not delete temp file: {str(e)}")
-        
+        # Задача завершена при создании - взят результат прошлой загрузки
+        is_new = not job.is_finished
+        logger.info(f"Detection job {job.job_id} {'queued' if is_new else 'reused previous result'}")
+        
+        if is_new and not settings.DETECTION_ASYNC:
+            jobs.run_detection_job(job, uploaded_file=uploaded_file)
+        if job.is_finished:
+            payload = _detection_job_payload(request, job)
+            if job.status == models.DetectionJob.STATUS_FAILED:
+                raise Exception(payload['error'])
+            payload['is_new'] = is_new
+            return JsonResponse(payload)
+        
+        # Клиент опрашивает status_url, пока воркер не выполнит задачу
         return JsonResponse({
-            'redirect_url': reverse('edit_results'),
+            'job_id': job.job_id,
+            'status': job.status,
+            'status_url': reverse('detection_job_status', args=[job.job_id]),
             'is_new': True
-        })
+        }, status=202)
         
     except Exception as e:
         logger.exception("Error in process_pdf")
@@ -1205,6 +989,186 @@ def process_pdf(request):
             'message': f'Ошибка обработки: {str(e)}'
         }, status=500)
 
+def process_pdf_document(request):
+    """Распознает выбранные страницы исходного PDF на сервере.
+
+    Страницы растеризуются в пуле процессов, каждая становится отдельной
+    задачей распознавания и отдельным DetectionResult с общим batch_id.
+    Номера страниц передаются в поле pages ("1-3,5"), по умолчанию все.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    uploaded_file = request.FILES.get('file')
+    if uploaded_file is None:
+        return JsonResponse({'error': 'No file provided'}, status=400)
+    if not uploaded_file.name.lower().endswith('.pdf'):
+        return JsonResponse({'error': 'Only PDF files are supported'}, status=400)
+
+    session_key = get_or_create_session_key(request)
+    user = request.user if request.user.is_authenticated else None
+    batch_id = str(uuid.uuid4())
+    batch_jobs = []
+
+    try:
+        with tempfile.TemporaryDirectory(prefix='pdf_pages_') as work_dir:
+            pdf_path = _uploaded_file_path(uploaded_file, work_dir)
+            pages = pdf_pages.parse_page_range(
+                request.POST.get('pages', ''),
+                pdf_pages.get_page_count(pdf_path)
+            )
+            if len(pages) > settings.PDF_MAX_PAGES:
+                return JsonResponse({
+                    'error': f'Можно распознать не больше {settings.PDF_MAX_PAGES} страниц за раз'
+                }, status=400)
+
+            page_paths = pdf_pages.rasterize_pages(pdf_path, pages, work_dir)
+
+            for page_number, page_path in zip(pages, page_paths):
+                with open(page_path, 'rb') as page_file:
+                    batch_jobs.append(jobs.create_detection_job(
+                        user=user,
+                        session_key=session_key,
+                        uploaded_file=File(page_file, name=f'page_{page_number}.png'),
+                        batch_id=batch_id,
+                        page_number=page_number,
+                        source_name=uploaded_file.name,
+                        save=False
+                    ))
+            models.DetectionJob.objects.bulk_create(batch_jobs)
+    except pdf_pages.PDFPagesError as e:
+        _delete_job_files(batch_jobs)
+        logger.warning(f"PDF не принят: {e}")
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception:
+        # Ошибка БД или хранилища: задачи не созданы, их файлы не нужны
+        _delete_job_files(batch_jobs)
+        raise
+
+    logger.info(f"PDF {uploaded_file.name}: {len(batch_jobs)} страниц поставлено в очередь, пакет {batch_id}")
+
+    if not settings.DETECTION_ASYNC:
+        # Страницы уходят в нейросеть одновременно
+        batch_jobs = jobs.run_detection_batch(batch_jobs)
+        return JsonResponse(_detection_batch_payload(batch_id, batch_jobs))
+
+    return JsonResponse(_detection_batch_payload(batch_id, batch_jobs), status=202)
+
+
+def upload_batch(request):
+    """Пакетная загрузка: несколько схем в поле files и/или zip-архивы.
+
+    Каждый файл - отдельная задача распознавания с общим batch_id,
+    прогресс по файлам отдает detection_batch_status.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    uploaded_files = request.FILES.getlist('files')
+    if not uploaded_files:
+        return JsonResponse({'error': 'No files provided'}, status=400)
+
+    session_key = get_or_create_session_key(request)
+    user = request.user if request.user.is_authenticated else None
+    batch_id = str(uuid.uuid4())
+    batch_jobs = []
+    skipped = []
+
+    try:
+        for name, batch_file in batch_upload.iter_batch_files(uploaded_files, skipped):
+            batch_jobs.append(jobs.create_detection_job(
+                user=user,
+                session_key=session_key,
+                uploaded_file=batch_file,
+                batch_id=batch_id,
+                source_name=name,
+                save=False
+            ))
+        if batch_jobs:
+            models.DetectionJob.objects.bulk_create(batch_jobs)
+    except batch_upload.BatchUploadError as e:
+        _delete_job_files(batch_jobs)
+        logger.warning(f"Пакет не принят: {e}")
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception:
+        _delete_job_files(batch_jobs)
+        raise
+
+    if not batch_jobs:
+        return JsonResponse({'error': 'В пакете нет изображений PNG/JPEG', 'skipped': skipped}, status=400)
+
+    logger.info(f"Пакет {batch_id}: {len(batch_jobs)} файлов поставлено в очередь")
+
+    if not settings.DETECTION_ASYNC:
+        batch_jobs = jobs.run_detection_batch(batch_jobs)
+
+    payload = _detection_batch_payload(batch_id, batch_jobs)
+    payload['skipped'] = skipped
+    return JsonResponse(payload, status=200 if not settings.DETECTION_ASYNC else 202)
+
+
+def _delete_job_files(batch_jobs):
+    """Удаляет уже скопированные в хранилище файлы несозданных задач"""
+    for job in batch_jobs:
+        try:
+            job.file.delete(save=False)
+        except OSError as e:
+            logger.warning(f"Не удалось удалить файл задачи {job.job_id}: {e}")
+
+
+def _uploaded_file_path(uploaded_file, work_dir):
+    """Путь к загруженному файлу на диске (pdftoppm читает только файлы)"""
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        return uploaded_file.temporary_file_path()
+
+    path = os.path.join(work_dir, 'source.pdf')
+    with open(path, 'wb') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+    return path
+
+
+def _detection_batch_payload(batch_id, batch_jobs):
+    """Состояние пакета задач: общий прогресс и статус каждой задачи"""
+    items = []
+    for job in batch_jobs:
+        item = {
+            'job_id': job.job_id,
+            'source_name': job.source_name,
+            'page_number': job.page_number,
+            'status': job.status,
+        }
+        if job.status == models.DetectionJob.STATUS_DONE:
+            item['result_id'] = job.result_id
+            item['result_url'] = reverse('view_result', args=[job.result_id])
+        elif job.status == models.DetectionJob.STATUS_FAILED:
+            item['error'] = job.error or 'Ошибка распознавания'
+        items.append(item)
+
+    finished = sum(1 for job in batch_jobs if job.is_finished)
+    return {
+        'batch_id': batch_id,
+        'status': 'done' if finished == len(batch_jobs) else 'processing',
+        'total': len(batch_jobs),
+        'finished': finished,
+        'failed': sum(1 for job in batch_jobs if job.status == models.DetectionJob.STATUS_FAILED),
+        'items': items,
+        'status_url': reverse('detection_batch_status', args=[batch_id]),
+    }
+
+
+def detection_batch_status(request, batch_id):
+    """AJAX прогресс пакетного распознавания"""
+    batch_jobs = list(
+        models.DetectionJob.objects.filter(batch_id=batch_id, **get_user_or_session_filter(request))
+        .exclude(batch_id='')
+        .order_by('page_number', 'id')
+    )
+    if not batch_jobs:
+        return JsonResponse({'success': False, 'error': 'Пакет не найден'}, status=404)
+
+    return JsonResponse(_detection_batch_payload(batch_id, batch_jobs))
+
 def create_pdf(request):
     """Рендерит страницу и созданиет файл PDF"""
     
@@ -1231,6 +1195,19 @@ def create_pdf(request):
                     {'error': 'Missing categories field'},
                     status=400
                 )
+            # Тот же набор товаров дает тот же PDF: ключ кэша служит и ETag
+            pdf_key = pdf_cache_key(data)
+            etag = quote_etag(pdf_key)
+            if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+
+            pdf_buffer = get_cached_pdf(pdf_key)
+            if pdf_buffer is not None:
+                logger.info("PDF отдан из кэша")
+                return _pdf_response(pdf_buffer, etag)
+
             categories = data.get('categories', [])
             item_counter = 1  # Общий счетчик элементов
             
@@ -1240,100 +1217,31 @@ def create_pdf(request):
                     element['number'] = item_counter
                     item_counter += 1
 
-            # Получение абсолютного пути к шрифту
-            static_dir = os.path.join(settings.BASE_DIR, 'static')
-            font_path = os.path.join(static_dir, 'font', 'manrope-regular.ttf')
-            
-            # Дополнительная проверка пути для Windows
-            font_path = os.path.abspath(font_path).replace('\\', '/')
-            
-            if not os.path.exists(font_path):
-                logger.error(f"Файл шрифта не найден: {font_path}")
+            # Шрифт, логотип и фото кодируются в base64 один раз на процесс
+            try:
+                assets = pdf_assets.get_context()
+            except MissingAssetError as e:
+                logger.error(str(e))
                 return JsonResponse({'error': 'Font file not found'}, status=500)
 
-            #  Использование base64 для шрифта
-            with open(font_path, 'rb') as font_file:
-                font_base64 = base64.b64encode(font_file.read()).decode('utf-8')
-
-            # Чтение логотипа
-            logo_path = os.path.join(static_dir, 'images', 'logo_for_contacts.png')
-            logo_path = os.path.abspath(logo_path).replace('\\', '/')
-            logo_base64 = None
-            if os.path.exists(logo_path):
-                with open(logo_path, 'rb') as logo_file:
-                    logo_base64 = base64.b64encode(logo_file.read()).decode('utf-8')
-
-            engineer_path = os.path.join(static_dir, 'images', 'kononuchenko_dmitriy.jpeg')
-            engineer_path = os.path.abspath(engineer_path).replace('\\', '/')
-            engineer_image_base64 = None
-            if os.path.exists(engineer_path):
-                with open(engineer_path, 'rb') as engineer_image_file:
-                    engineer_image_base64 = base64.b64encode(engineer_image_file.read()).decode('utf-8')
-
-            manager_path = os.path.join(static_dir, 'images', 'petrova_antonina.jpg')
-            manager_path = os.path.abspath(manager_path).replace('\\', '/')
-            manager_image_base64 = None
-            if os.path.exists(manager_path):
-                with open(manager_path, 'rb') as manager_image_file:
-                    manager_image_base64 = base64.b64encode(manager_image_file.read()).decode('utf-8')
-            
-            # Рендеринг HTML
-            html = render_to_string('recognition/pdf_template.html', {
-                'data': data,
-                'FONT_BASE64': font_base64,
-                'LOGO_BASE64': logo_base64,
-                'ENGINEER_BASE64': engineer_image_base64,
-                'MANAGER_BASE64': manager_image_base64
-            })
+            context = {'data': data, **assets}
 
-            # Настройки для PDFKit
-            options = {
-                'encoding': 'UTF-8',
-                'quiet': '',
-                'enable-local-file-access': None,
-                'no-stop-slow-scripts': '',
-                'load-error-handling': 'ignore',
-                'margin-top': '15mm',
-                'margin-bottom': '15mm',
-                'margin-left': '10mm',
-                'margin-right': '10mm',
-                'dpi': 300,
-                'image-quality': 100,
-            }
-
-            # Для Windows обязательно указывание пути к wkhtmltopdf
-            config = pdfkit.configuration(
-                wkhtmltopdf=r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'
-                #wkhtmltopdf=r"/usr/local/bin/wkhtmltopdf" " - для хостинга beget
-            )
+            # Фоновый режим: сразу отдаем id задачи, клиент опрашивает статус
+            if settings.PDF_ASYNC:
+                status = pdf_jobs.submit_pdf_job(pdf_key, context)
+                return JsonResponse(_pdf_job_payload(pdf_key, status), status=202)
 
             try:
-                # Прямое создание PDF из HTML
-                pdf_buffer = pdfkit.from_string(
-                    html,
-                    False,
-                    options=options,
-                    configuration=config
-                )
-                
-                # Вариант 2: Сохранение во временный файл (для дебага)
-                # import tempfile
-                # with tempfile.NamedTemporaryFile(suffix='.html', delete=False) as tmp_html:
-                #     tmp_html.write(html.encode('utf-8'))
-                #     tmp_html_path = tmp_html.name
-                # 
-                # with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_pdf:
-                #     pdfkit.from_file(tmp_html_path, tmp_pdf.name, options=options, configuration=config)
-                #     with open(tmp_pdf.name, 'rb') as f:
-                #         pdf_buffer = f.read()
-                # 
-                # os.unlink(tmp_html_path)
-                # os.unlink(tmp_pdf.name)
-
-                response = HttpResponse(pdf_buffer, content_type='application/pdf')
-                response['Content-Disposition'] = 'attachment; filename="recognition_results.pdf"'
-                return response
+                # Рендеринг HTML и PDF выбранным бэкендом (settings.PDF_BACKEND)
+                pdf_buffer = pdf_jobs.render_pdf_limited(context, timeout=settings.PDF_QUEUE_TIMEOUT)
+                store_pdf(pdf_key, pdf_buffer)
+                return _pdf_response(pdf_buffer, etag)
 
+            except pdf_jobs.PDFBusyError:
+                logger.warning("Генерация PDF отклонена: все слоты заняты")
+                response = JsonResponse({'error': 'PDF service is busy'}, status=503)
+                response['Retry-After'] = '5'
+                return response
             except Exception as e:
                 logger.error(f"Ошибка при создании PDF: {str(e)}")
                 return JsonResponse({'error': 'PDF creation error'}, status=500)
@@ -1342,4 +1250,61 @@ def create_pdf(request):
             logger.exception("Непредвиденная ошибка при генерации PDF")
             return JsonResponse({'error': 'Internal server error'}, status=500)
     
-    return JsonResponse({'error': 'Method not allowed'}, status=405)
\ No newline at end of file
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+
+def _pdf_response(pdf_buffer, etag):
+    """Ответ с PDF; по ETag браузер может не скачивать тот же файл повторно"""
+    response = HttpResponse(pdf_buffer, content_type='application/pdf')
+    response['Content-Disposition'] = 'attachment; filename="recognition_results.pdf"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _pdf_job_payload(job_id, status):
+    payload = {
+        'job_id': job_id,
+        'status': status,
+        'status_url': reverse('pdf_job_status', args=[job_id]),
+    }
+    if status == pdf_jobs.STATUS_DONE:
+        payload['download_url'] = reverse('pdf_job_download', args=[job_id])
+    elif status == pdf_jobs.STATUS_FAILED:
+        payload['error'] = 'PDF creation error'
+    return payload
+
+
+def pdf_job_status(request, job_id):
+    """AJAX статус фоновой генерации PDF.
+
+    Отвечает сразу, не занимая воркер ожиданием: пока PDF не готов,
+    Retry-After (и retry_after в JSON) подсказывает, через сколько
+    секунд спросить снова.
+    """
+    if not pdf_jobs.is_valid_job_id(job_id):
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+
+    status = pdf_jobs.get_job_status(job_id)
+    payload = _pdf_job_payload(job_id, status)
+    if status == pdf_jobs.STATUS_PENDING:
+        payload['retry_after'] = settings.PDF_JOB_POLL_INTERVAL
+    response = JsonResponse(payload)
+    if status == pdf_jobs.STATUS_PENDING:
+        response['Retry-After'] = str(settings.PDF_JOB_POLL_INTERVAL)
+    return response
+
+
+def download_pdf(request, job_id):
+    """Скачивание PDF, созданного в фоне"""
+    if not pdf_jobs.is_valid_job_id(job_id) or pdf_jobs.get_job_status(job_id) != pdf_jobs.STATUS_DONE:
+        return JsonResponse({'error': 'PDF not found'}, status=404)
+
+    etag = quote_etag(job_id)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    with default_storage.open(pdf_jobs.pdf_name(job_id), 'rb') as f:
+        return _pdf_response(f.read(), etag)
\ No newline at end of file
@@ -59,9 +59,9 @@ async function deleteResult(resultId, csrfToken) {
                 setTimeout(() => {
                     element.remove();
                     
-                    // Проверяем, остались ли еще элементы
+                    // Проверяем, остались ли еще элементы (и не осталось ли страниц)
                     const historyList = document.querySelector('.history-list');
-                    if (historyList && historyList.children.length === 0) {
+                    if (historyList && !historyList.querySelector('.history-item-wrapper') && !historyList.dataset.nextUrl) {
                         historyList.innerHTML = `
                             <div class="empty-state">
                                 <p>У вас пока нет сохраненных результатов</p>
@@ -99,6 +99,112 @@ async function deleteResult(resultId, csrfToken) {
     }
 }
 
+// Элемент истории из JSON (разметка как в шаблоне dashboard.html)
+function createHistoryItem(result) {
+    const wrapper = document.createElement('div');
+    wrapper.className = 'history-item-wrapper';
+    wrapper.id = `result-${result.result_id}`;
+
+    const link = document.createElement('a');
+    link.href = result.url;
+    link.className = 'history-item';
+
+    const thumbnail = document.createElement('div');
+    thumbnail.className = 'item-thumbnail';
+    if (result.thumbnail_url) {
+        const img = document.createElement('img');
+        img.src = result.thumbnail_url;
+        img.alt = 'Thumbnail';
+        img.className = 'thumbnail-image';
+        img.loading = 'lazy';
+        thumbnail.appendChild(img);
+    } else {
+        thumbnail.innerHTML = '<div class="thumbnail-placeholder"><span>📷</span></div>';
+    }
+
+    const info = document.createElement('div');
+    info.className = 'item-info';
+    const date = document.createElement('div');
+    date.className = 'item-date';
+    date.textContent = result.date;
+    const time = document.createElement('div');
+    time.className = 'item-time';
+    time.textContent = result.time;
+    info.append(date, time);
+    if (result.edited_at) {
+        const edited = document.createElement('div');
+        edited.className = 'item-edited';
+        edited.innerHTML = '<i>✎</i> ';
+        edited.append(`Редактировано: ${result.edited_at}`);
+        info.appendChild(edited);
+    }
+
+    link.append(thumbnail, info);
+
+    const deleteButton = document.createElement('button');
+    deleteButton.className = 'delete-btn';
+    deleteButton.textContent = '×';
+    deleteButton.addEventListener('click', () => confirmDelete(result.result_id));
+
+    wrapper.append(link, deleteButton);
+    return wrapper;
+}
+
+// Бесконечная прокрутка истории: следующая страница грузится,
+// когда до экрана доходит .history-sentinel в конце списка
+function initInfiniteScroll() {
+    const historyList = document.querySelector('.history-list');
+    const sentinel = historyList?.querySelector('.history-sentinel');
+    if (!sentinel || !('IntersectionObserver' in window)) {
+        return;
+    }
+
+    let loading = false;
+
+    const loadNextPage = async () => {
+        const nextUrl = historyList.dataset.nextUrl;
+        if (loading || !nextUrl) {
+            return;
+        }
+        loading = true;
+        try {
+            const response = await fetch(nextUrl, {
+                headers: { 'Accept': 'application/json' }
+            });
+            const data = await response.json();
+            if (!response.ok || !data.success) {
+                throw new Error(data.error || 'Не удалось загрузить историю');
+            }
+
+            data.results.forEach(result => {
+                historyList.insertBefore(createHistoryItem(result), sentinel);
+            });
+
+            if (data.next_page_url) {
+                historyList.dataset.nextUrl = data.next_page_url;
+            } else {
+                delete historyList.dataset.nextUrl;
+                observer.disconnect();
+                sentinel.remove();
+            }
+        } catch (error) {
+            console.error('Error loading history:', error);
+            if (window.toast) {
+                window.toast.error(error.message);
+            }
+        } finally {
+            loading = false;
+        }
+    };
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadNextPage();
+        }
+    }, { root: historyList, rootMargin: '200px' });
+    observer.observe(sentinel);
+}
+
 // Инициализация при загрузке страницы
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Dashboard.js loaded');
@@ -130,6 +236,8 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    initInfiniteScroll();
+    
     // Показываем сообщения из Django
     if (window.djangoMessages) {
         window.djangoMessages.forEach(function(msg) {
@@ -977,7 +977,7 @@ document.addEventListener('DOMContentLoaded', async () => {
         console.log('DOM загружен, инициализируем EditManager');
         console.log('Проверка глобальных переменных:');
         console.log('- DETECTED_DATA:', window.DETECTED_DATA);
-        console.log('- IMAGE_BASE64:', window.IMAGE_BASE64 ? 'Есть' : 'Нет');
+        console.log('- IMAGE_URL:', window.IMAGE_URL ? 'Есть' : 'Нет');
         console.log('- RESULT_ID:', window.RESULT_ID);
         console.log('- TYPE_TRANSLATIONS:', TYPE_TRANSLATIONS);
         
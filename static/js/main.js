@@ -316,7 +316,10 @@ document.addEventListener('DOMContentLoaded', function() {
                         }
                     }
                     
-                    const data = await response.json();
+                    let data = await response.json();
+                    if (data.status_url) {
+                        data = await fileUploadHandler.waitForJob(data.status_url);
+                    }
                     if (data.redirect_url) {
                         window.location.href = data.redirect_url;
                     } else {
@@ -380,6 +383,19 @@ document.addEventListener('DOMContentLoaded', function() {
     // Проверяем при загрузке страницы
     checkResultsAccess();
 
+    // Если форма была отправлена без JS, задача уже в очереди - ждем ее
+    if (window.API_URLS.detectionJobStatus) {
+        fileUploadHandler.startProcessing();
+        fileUploadHandler.waitForJob(window.API_URLS.detectionJobStatus)
+            .then(data => {
+                if (data.redirect_url) {
+                    window.location.href = data.redirect_url;
+                }
+            })
+            .catch(error => fileUploadHandler.handleProcessError(error))
+            .finally(() => fileUploadHandler.endProcessing());
+    }
+
     const toggleSelectionBtn = document.getElementById('toggleSelection');
 const resetSelectionBtn = document.getElementById('resetSelection');
 const convertSelectionBtn = document.getElementById('convertSelection');
@@ -538,9 +554,14 @@ if (convertSelectionBtn) {
             }
             
             // 10. ОБРАБОТКА ОТВЕТА
-            const data = await response.json();
+            let data = await response.json();
             console.log('Response data:', data);
             
+            if (data.status_url) {
+                console.log('Waiting for detection job...');
+                data = await fileUploadHandler.waitForJob(data.status_url);
+            }
+            
             if (data.redirect_url) {
                 console.log('Redirecting to:', data.redirect_url);
                 window.location.href = data.redirect_url;
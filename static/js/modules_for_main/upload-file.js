@@ -93,7 +93,12 @@ export class FileUploadHandler {
             }
             
             // Обработка успешного ответа
-            const data = await response.json();
+            let data = await response.json();
+            
+            // Распознавание идет в очереди - ждем завершения задачи
+            if (data.status_url) {
+                data = await this.waitForJob(data.status_url);
+            }
             
             if (data.redirect_url) {
                 window.location.href = data.redirect_url;
@@ -182,7 +187,12 @@ export class FileUploadHandler {
             }
             
             // Обработка успешного ответа
-            const data = await response.json();
+            let data = await response.json();
+            
+            // Распознавание идет в очереди - ждем завершения задачи
+            if (data.status_url) {
+                data = await this.waitForJob(data.status_url);
+            }
             
             if (data.redirect_url) {
                 window.location.href = data.redirect_url;
@@ -202,6 +212,36 @@ export class FileUploadHandler {
         }
     }
 
+    // Ожидание завершения задачи распознавания на сервере
+    async waitForJob(statusUrl, interval = 1500, timeout = 600000) {
+        const startedAt = Date.now();
+        
+        while (Date.now() - startedAt < timeout) {
+            const response = await fetch(statusUrl, {
+                headers: {
+                    'X-Requested-With': 'XMLHttpRequest'
+                }
+            });
+            
+            if (!response.ok) {
+                throw new Error(`Ошибка сервера: ${response.status}`);
+            }
+            
+            const data = await response.json();
+            
+            if (data.status === 'done') {
+                return data;
+            }
+            if (data.status === 'failed') {
+                throw new Error(data.error || 'Ошибка распознавания');
+            }
+            
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+        
+        throw new Error('TimeoutError');
+    }
+
     // Функции для управления UI
     highlight() {
         document.getElementById('dropArea').classList.add('highlight');
@@ -15,6 +15,36 @@ const fieldRelations = {
     }
 };
 
+// Таблица кандидатов страницы (json_script #result-items). У комбобоксов,
+// отрисованных сервером, value каждого option - индекс товара в ней,
+// одинаковый во всех трех комбобоксах строки
+let resultItems = null;
+
+export function getResultItems() {
+    if (resultItems === null) {
+        const element = document.getElementById('result-items');
+        resultItems = element ? JSON.parse(element.textContent) : [];
+    }
+    return resultItems;
+}
+
+// Товар {id, name, price}, выбранный в комбобоксе (или null)
+export function getSelectedItem(combobox) {
+    if (!combobox || combobox.value === '') return null;
+
+    // Комбобоксы групп, добавленных на странице, хранят свои данные в data-items
+    if (combobox.dataset.items) {
+        const matchBy = combobox.classList.contains('combobox-name') ? 'name' :
+                        combobox.classList.contains('combobox-price') ? 'price' : 'id';
+        return JSON.parse(combobox.dataset.items).find(item =>
+            String(item[matchBy]) === combobox.value ||
+            (matchBy === 'price' && `${item.price}.0 руб.` === combobox.value)
+        ) || null;
+    }
+
+    return getResultItems()[Number(combobox.value)] || null;
+}
+
 // Универсальная функция синхронизации комбобоксов
 export function syncComboboxes(sourceCombobox) {
     const row = sourceCombobox.closest('.combobox-row, .combobox-row-grouped');
@@ -107,6 +137,15 @@ export function handleComboboxChange() {
                           changedComboBox.classList.contains('combobox-price') ? 'price' : null;
         if (!changedType) return;
 
+        // Серверные комбобоксы: value - индекс товара, одинаковый во всей строке
+        if (!changedComboBox.dataset.items) {
+            fieldRelations[changedType].linked.forEach(relatedType => {
+                const targetComboBox = row.querySelector(`.combobox-${relatedType}`);
+                if (targetComboBox) targetComboBox.value = selectedValue;
+            });
+            return;
+        }
+
         // Получение данных из атрибута data-items
         const itemsData = JSON.parse(changedComboBox.dataset.items || '[]');
         
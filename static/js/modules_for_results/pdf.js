@@ -1,5 +1,10 @@
 import { getCSRFToken } from './utils.js';
 import { showCustomAlert, showToast } from '../alerts.js';
+import { getSelectedItem } from './comboboxes.js';
+
+// Последний скачанный PDF: если данные не изменились, сервер ответит 304
+// по ETag, и файл берется отсюда без повторной загрузки
+let lastPDF = null;
 
 export function createPDF() {
     //  Подготовка структуры данных для PDF
@@ -46,12 +51,14 @@ export function createPDF() {
                     const article = articleSelect.options[articleSelect.selectedIndex].text;
                     const name = nameSelect ? nameSelect.options[nameSelect.selectedIndex]?.text : '';
                     
-                    // Обработка цен (удаление все нечисловых символов и замена запятой на точку)
+                    // Цена из таблицы кандидатов, иначе из текста option
+                    // (удаление всех нечисловых символов и замена запятой на точку)
+                    const selectedItem = getSelectedItem(priceSelect);
                     const priceText = priceSelect ? priceSelect.options[priceSelect.selectedIndex]?.text : '0';
-                    const priceValue = parseFloat(
+                    const priceValue = (selectedItem ? parseFloat(selectedItem.price) : parseFloat(
                         priceText.replace(/[^\d.,]/g, '')
                                .replace(',', '.')
-                    ) || 0;
+                    )) || 0;
 
                     // Получение количества (по умолчанию 1)
                     const quantity = quantityInput ? parseInt(quantityInput.value) || 1 : 1;
@@ -137,18 +144,36 @@ export function createPDF() {
     pdfBtn.textContent = 'Генерация...';
 
     // Отправка данных на сервер для генерации PDF
+    const headers = {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': getCSRFToken(),
+        'X-Requested-With': 'XMLHttpRequest'
+    };
+    if (lastPDF) {
+        headers['If-None-Match'] = lastPDF.etag;
+    }
+
     fetch('/create-pdf/', {
         method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-            'X-CSRFToken': getCSRFToken(),
-            'X-Requested-With': 'XMLHttpRequest'
-        },
+        headers: headers,
         body: JSON.stringify(pdfData)
     })
-    .then(response => {
+    .then(async response => {
+        if (response.status === 304 && lastPDF) return lastPDF.blob;
         if (!response.ok) throw new Error(`HTTP ${response.status}`);
-        return response.blob();
+
+        // Фоновая генерация: ждем готовности и скачиваем файл
+        if (response.status === 202) {
+            const job = await response.json();
+            const downloadUrl = job.download_url || await waitForPDF(job.status_url);
+            response = await fetch(downloadUrl);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        }
+
+        const etag = response.headers.get('ETag');
+        const blob = await response.blob();
+        lastPDF = etag ? { etag: etag, blob: blob } : null;
+        return blob;
     })
     .then(blob => {
         if (!blob || blob.size === 0) {
@@ -167,6 +192,28 @@ export function createPDF() {
     });
 }
 
+// Ожидание фоновой генерации PDF (опрос статуса), возвращает ссылку на файл
+async function waitForPDF(statusUrl, timeout = 300000) {
+    const deadline = Date.now() + timeout;
+
+    while (Date.now() < deadline) {
+        const response = await fetch(statusUrl, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' }
+        });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+
+        const job = await response.json();
+        if (job.status === 'done') return job.download_url;
+        if (job.status === 'failed') throw new Error(job.error || 'PDF creation error');
+
+        // Сервер подсказывает, когда спросить снова
+        const retryAfter = Number(response.headers.get('Retry-After')) || job.retry_after || 1;
+        await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+    }
+
+    throw new Error('Превышено время ожидания PDF');
+}
+
 // Вспомогательная функция для скачивания PDF
 function downloadPDF(blob) {
     const url = URL.createObjectURL(blob);